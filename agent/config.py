@@ -16,3 +16,23 @@ FORBIDDEN_IMPORTS = [
     "socket",
     "shutil.rmtree",
 ]
+
+# SQLite database that collects every evaluation / mutation / sandbox / generation run
+RESULTS_DB_PATH = os.getenv("RESULTS_DB_PATH", "data/results/results.db")
+
+# Shared job queue for distributed mutation / evaluation workers
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "data/jobs/queue.db")
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# A coordinator stops waiting once no worker has touched its batch for this long
+JOB_STALL_SECONDS = float(os.getenv("JOB_STALL_SECONDS", str(3 * JOB_LEASE_SECONDS)))
+
+# Model responses are cached here by prompt hash so repeated prompts cost nothing
+GENERATION_CACHE_DIR = os.getenv("GENERATION_CACHE_DIR", "data/cache/generation")
+
+# Runtime budgets for generated test suites (seconds): tests slower than the
+# per-test budget are flagged, a test still running at the per-test limit is
+# interrupted, and the whole sandbox run is killed at the suite budget.
+PER_TEST_BUDGET_SECONDS = float(os.getenv("PER_TEST_BUDGET_SECONDS", "1.0"))
+PER_TEST_TIME_LIMIT_SECONDS = float(os.getenv("PER_TEST_TIME_LIMIT_SECONDS", "10"))
+SUITE_BUDGET_SECONDS = float(os.getenv("SUITE_BUDGET_SECONDS", "30"))
@@ -1,19 +1,57 @@
 """Evaluation harness for baseline and generated tests.
 
 Metrics:
-- Coverage (statement + branch)
+- Coverage (statement + branch), overall and per file/line
 - Flakiness (multiple runs)
-- Basic pass/fail statistics
+- Basic pass/fail statistics, overall and per test
 """
 
 from __future__ import annotations
 
 import json
+import os
 import subprocess
 import sys
-from dataclasses import dataclass, asdict
+import tempfile
+import uuid
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, asdict, field, replace
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+from .impact import (
+    build_impact_map,
+    covered_lines,
+    node_key,
+    select_affected_tests,
+    source_files,
+    update_impact_map,
+)
+from .job_queue import Job, JobQueue, failed_jobs
+from .results_store import ResultsStore, use_store
+
+# Mirrors ``[tool.coverage.run] source`` in pyproject.toml.
+COVERAGE_SOURCE = ["src"]
+
+
+@dataclass
+class TestOutcome:
+    test_id: str
+    outcome: str  # "passed", "failed", "error" or "skipped" ("timeout" in sandbox runs)
+    duration_seconds: float
+    failures: int = 0  # how many of the runs this test did not pass
+
+
+@dataclass
+class FileCoverage:
+    path: str
+    num_statements: int
+    covered_lines: int
+    num_branches: int
+    covered_branches: int
+    executed_lines: List[int] = field(default_factory=list)
+    missing_lines: List[int] = field(default_factory=list)
+    missing_branches: List[Tuple[int, int]] = field(default_factory=list)
 
 
 @dataclass
@@ -26,9 +64,11 @@ class SuiteMetrics:
     flaky_tests: int
     coverage_statement: float
     coverage_branch: float
+    test_outcomes: List[TestOutcome] = field(default_factory=list)
+    file_coverage: List[FileCoverage] = field(default_factory=list)
 
 
-def _run_pytest_with_coverage(test_paths: List[str]) -> int:
+def _run_pytest_with_coverage(test_paths: List[str], junit_path: Optional[Path] = None) -> int:
     """Run pytest with coverage for given test paths, returning exit code."""
     cmd = [
         sys.executable,
@@ -39,56 +79,336 @@ def _run_pytest_with_coverage(test_paths: List[str]) -> int:
         "pytest",
         *test_paths,
     ]
+    if junit_path is not None:
+        cmd.append(f"--junitxml={junit_path}")
     proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
     return proc.returncode
 
 
-def _compute_coverage() -> Dict[str, float]:
-    """Compute coverage metrics using 'coverage json'."""
+def _junit_test_id(classname: str, name: str, test_paths: List[str]) -> str:
+    """Turn a JUnit ``classname``/``name`` pair back into a pytest node id."""
+    for test_path in test_paths:
+        path = Path(test_path.split("::", 1)[0])
+        try:
+            path = path.resolve().relative_to(Path.cwd().resolve())
+        except ValueError:
+            pass
+        dotted = ".".join(path.with_suffix("").parts)
+        if classname == dotted or classname.startswith(dotted + "."):
+            rest = classname[len(dotted) + 1 :]
+            node = path.as_posix()
+            for part in rest.split(".") if rest else []:
+                node += f"::{part}"
+            return f"{node}::{name}"
+    return f"{classname}::{name}"
+
+
+def parse_junit_report(junit_path: Path, test_paths: List[str]) -> List[TestOutcome]:
+    """Read per-test outcomes and durations from a pytest ``--junitxml`` report."""
+    if not junit_path.exists():
+        return []
+    outcomes: List[TestOutcome] = []
+    for case in ET.parse(junit_path).getroot().iter("testcase"):
+        if case.find("failure") is not None:
+            outcome = "failed"
+        elif case.find("error") is not None:
+            outcome = "error"
+        elif case.find("skipped") is not None:
+            outcome = "skipped"
+        else:
+            outcome = "passed"
+        outcomes.append(
+            TestOutcome(
+                test_id=_junit_test_id(case.get("classname", ""), case.get("name", ""), test_paths),
+                outcome=outcome,
+                duration_seconds=float(case.get("time") or 0.0),
+                failures=int(outcome in ("failed", "error")),
+            )
+        )
+    return outcomes
+
+
+def _load_coverage_json() -> Dict[str, Any]:
+    """Export the last coverage run (including per-test contexts) and load it."""
     subprocess.run(
-        [sys.executable, "-m", "coverage", "json", "-q"],
+        [sys.executable, "-m", "coverage", "json", "-q", "--show-contexts"],
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         text=True,
     )
-    data = json.loads(Path("coverage.json").read_text(encoding="utf-8"))
+    return json.loads(Path("coverage.json").read_text(encoding="utf-8"))
+
+
+def _compute_coverage(data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Compute coverage metrics using 'coverage json'."""
+    if data is None:
+        data = _load_coverage_json()
     totals = data.get("totals", {})
     stmts = totals.get("num_statements", 0) or 0
     covered = totals.get("covered_lines", 0) or 0  # <-- fix here
     branches = totals.get("num_branches", 0) or 0
     covered_branches = totals.get("covered_branches", 0) or 0
 
+    files: List[FileCoverage] = []
+    for path, info in sorted(data.get("files", {}).items()):
+        summary = info.get("summary", {})
+        files.append(
+            FileCoverage(
+                path=Path(path).as_posix(),
+                num_statements=summary.get("num_statements", 0) or 0,
+                covered_lines=summary.get("covered_lines", 0) or 0,
+                num_branches=summary.get("num_branches", 0) or 0,
+                covered_branches=summary.get("covered_branches", 0) or 0,
+                executed_lines=list(info.get("executed_lines", [])),
+                missing_lines=list(info.get("missing_lines", [])),
+                missing_branches=[(a, b) for a, b in info.get("missing_branches", [])],
+            )
+        )
+
     return {
-    "statement": (covered / stmts) if stmts else 0.0,
-    "branch": (covered_branches / branches) if branches else 0.0,
-}
+        "statement": (covered / stmts) if stmts else 0.0,
+        "branch": (covered_branches / branches) if branches else 0.0,
+        "files": files,
+    }
 
 
-def evaluate_suite(name: str, test_glob: str, runs: int = 5) -> SuiteMetrics:
-    """Evaluate a test suite glob pattern over multiple runs to estimate flakiness."""
-    test_paths = [str(p) for p in Path(".").glob(test_glob)]
-    if not test_paths:
-        raise ValueError(f"No tests matched pattern {test_glob}")
+def _merge_test_outcomes(per_run: List[List[TestOutcome]]) -> List[TestOutcome]:
+    """Fold per-run outcomes into one entry per test: last outcome, mean duration, failure count."""
+    merged: Dict[str, TestOutcome] = {}
+    durations: Dict[str, List[float]] = {}
+    for outcomes in per_run:
+        for t in outcomes:
+            previous = merged.get(t.test_id)
+            failures = (previous.failures if previous else 0) + t.failures
+            merged[t.test_id] = TestOutcome(t.test_id, t.outcome, t.duration_seconds, failures)
+            durations.setdefault(t.test_id, []).append(t.duration_seconds)
+    for test_id, t in merged.items():
+        samples = durations[test_id]
+        t.duration_seconds = sum(samples) / len(samples)
+    return list(merged.values())
+
 
-    passes = 0
-    failures = 0
+def plan_rerun_jobs(test_paths: List[str], runs: int, first_run_index: int = 0) -> List[Job]:
+    """Split the flakiness reruns of a suite into one serializable job per run."""
+    project_root = Path.cwd().resolve()
+    rel_paths = []
+    for test_path in test_paths:
+        path = Path(test_path).resolve()
+        try:
+            rel_paths.append(path.relative_to(project_root).as_posix())
+        except ValueError:
+            rel_paths.append(path.as_posix())
+    return [
+        Job(
+            kind="rerun",
+            payload={"project_root": str(project_root), "test_paths": rel_paths, "run_index": i},
+        )
+        for i in range(first_run_index, first_run_index + runs)
+    ]
 
-    # Very simple flakiness estimation: count how many times exit code changes.
-    last_exit_code = None
-    flakiness_events = 0
 
-    for i in range(runs):
-        exit_code = _run_pytest_with_coverage(test_paths)
-        if exit_code == 0:
-            passes += 1
-        else:
-            failures += 1
+def run_rerun_job(payload: Dict[str, Any], workspace: Path) -> Dict[str, Any]:
+    """Execute one rerun job inside ``workspace`` and report exit code and per-test outcomes."""
+    test_paths = payload["test_paths"]
+    with tempfile.TemporaryDirectory() as tmp:
+        junit_path = Path(tmp) / "report.xml"
+        cmd = [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", *test_paths, f"--junitxml={junit_path}"]
+        proc = subprocess.run(
+            cmd,
+            cwd=workspace,
+            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        outcomes = parse_junit_report(junit_path, test_paths)
+    return {
+        "run_index": payload["run_index"],
+        "exit_code": proc.returncode,
+        "outcomes": [asdict(t) for t in outcomes],
+    }
+
+
+def _run_suite(
+    name: str,
+    test_args: List[str],
+    runs: int,
+    queue: Optional[JobQueue] = None,
+) -> Tuple[List[int], List[List[TestOutcome]]]:
+    """Run ``test_args`` (paths or node ids) ``runs`` times; return exit codes and outcomes per run.
+
+    The first run always happens locally under coverage. With a `queue`, the
+    remaining reruns are submitted as jobs and collected once the workers are done.
+    """
+    exit_codes: List[int] = []
+    per_run_outcomes: List[List[TestOutcome]] = []
+    local_runs = runs if queue is None else min(runs, 1)
+
+    batch = None
+    if queue is not None and runs > local_runs:
+        batch = f"rerun-{name}-{uuid.uuid4().hex[:12]}"
+        queue.submit(batch, plan_rerun_jobs(test_args, runs - local_runs, first_run_index=local_runs))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(local_runs):
+            junit_path = Path(tmp) / f"run_{i}.xml"
+            exit_codes.append(_run_pytest_with_coverage(test_args, junit_path))
+            per_run_outcomes.append(parse_junit_report(junit_path, test_args))
+
+    if batch is not None:
+        results = queue.wait(batch)
+        failed = failed_jobs(results)
+        if failed:
+            raise RuntimeError(f"{len(failed)} rerun job(s) of suite {name!r} failed permanently")
+        for r in sorted(results, key=lambda r: r.result["run_index"]):
+            exit_codes.append(r.result["exit_code"])
+            per_run_outcomes.append([TestOutcome(**t) for t in r.result["outcomes"]])
 
-        if last_exit_code is not None and exit_code != last_exit_code:
-            flakiness_events += 1
-        last_exit_code = exit_code
+    return exit_codes, per_run_outcomes
 
-    cov = _compute_coverage()
+
+def _flakiness_events(ok_per_run: List[bool]) -> int:
+    # Very simple flakiness estimation: count how many times the suite result changes.
+    return sum(1 for prev, cur in zip(ok_per_run, ok_per_run[1:]) if prev != cur)
+
+
+def _load_previous_metrics(store: ResultsStore, name: str) -> Optional[SuiteMetrics]:
+    row = store.latest_suite(name)
+    if row is None:
+        return None
+    return SuiteMetrics(
+        name=name,
+        test_paths=json.loads(row["test_paths"]),
+        runs=row["runs"],
+        passes=row["passes"],
+        failures=row["failures"],
+        flaky_tests=row["flaky_tests"],
+        coverage_statement=row["coverage_statement"],
+        coverage_branch=row["coverage_branch"],
+        test_outcomes=[TestOutcome(*t) for t in store.iter_test_outcomes(row["run_id"], name)],
+        file_coverage=[FileCoverage(*f) for f in store.iter_coverage_files(row["run_id"], name)],
+    )
+
+
+def _evaluate_affected(
+    name: str,
+    test_paths: List[str],
+    runs: int,
+    store: ResultsStore,
+    queue: Optional[JobQueue],
+) -> Optional[SuiteMetrics]:
+    """Rerun only the tests affected by changes since the stored impact map.
+
+    Returns None when there is no previous map or result to build on.
+    """
+    impact_map = store.load_impact_map(name)
+    previous = _load_previous_metrics(store, name)
+    if impact_map is None or previous is None:
+        return None
+
+    selection = select_affected_tests(impact_map, test_paths, source_paths=source_files(COVERAGE_SOURCE))
+    if selection.is_empty:
+        return replace(previous, test_paths=test_paths)
+
+    test_args = selection.rerun_files + selection.rerun_tests
+    if test_args:
+        exit_codes, per_run_outcomes = _run_suite(name, test_args, runs, queue)
+    else:
+        # Nothing to rerun, but sources changed: collecting the suite under
+        # coverage is enough to measure the new statement counts.
+        _run_pytest_with_coverage(["--collect-only", "-q", *test_paths])
+        exit_codes, per_run_outcomes = [], []
+
+    data = _load_coverage_json()
+    fresh_outcomes = _merge_test_outcomes(per_run_outcomes)
+    fresh_map = build_impact_map(data, [t.test_id for t in fresh_outcomes], test_paths)
+    new_map = update_impact_map(impact_map, selection, fresh_map)
+    store.save_impact_map(name, new_map)
+
+    rerun = set(selection.rerun_tests) | set(fresh_map.tests)
+    carried = [
+        t
+        for t in previous.test_outcomes
+        if node_key(t.test_id) not in rerun and node_key(t.test_id) not in selection.removed_tests
+    ]
+    carried_ok = not any(t.outcome in ("failed", "error") for t in carried)
+    # Exit code 5 means "no tests collected", e.g. an edited test file that is now empty.
+    ok_per_run = [code in (0, 5) and carried_ok for code in exit_codes] or [carried_ok] * previous.runs
+
+    # Coverage is rebuilt from the updated map, so lines covered only by
+    # deleted tests disappear while lines of carried tests stay covered.
+    files: List[FileCoverage] = []
+    for fresh in _compute_coverage(data)["files"]:
+        info = data["files"].get(fresh.path) or data["files"].get(str(Path(fresh.path)), {})
+        statements = set(fresh.executed_lines) | set(fresh.missing_lines)
+        covered = covered_lines(new_map, fresh.path) & statements
+        branch_arcs = {(a, b) for a, b in info.get("executed_branches", []) + info.get("missing_branches", [])}
+        covered_arcs = new_map.arcs.get(fresh.path, set()) & branch_arcs
+        files.append(
+            FileCoverage(
+                path=fresh.path,
+                num_statements=len(statements),
+                covered_lines=len(covered),
+                num_branches=fresh.num_branches,
+                covered_branches=len(covered_arcs),
+                executed_lines=sorted(covered),
+                missing_lines=sorted(statements - covered),
+                missing_branches=sorted(branch_arcs - covered_arcs),
+            )
+        )
+
+    total_statements = sum(f.num_statements for f in files)
+    total_branches = sum(f.num_branches for f in files)
+    return SuiteMetrics(
+        name=name,
+        test_paths=test_paths,
+        runs=len(ok_per_run),
+        passes=sum(ok_per_run),
+        failures=len(ok_per_run) - sum(ok_per_run),
+        flaky_tests=_flakiness_events(ok_per_run),
+        coverage_statement=sum(f.covered_lines for f in files) / total_statements if total_statements else 0.0,
+        coverage_branch=sum(f.covered_branches for f in files) / total_branches if total_branches else 0.0,
+        test_outcomes=carried + fresh_outcomes,
+        file_coverage=files,
+    )
+
+
+def evaluate_suite(
+    name: str,
+    test_glob: str,
+    runs: int = 5,
+    queue: Optional[JobQueue] = None,
+    store: Optional[ResultsStore] = None,
+    affected_only: bool = False,
+) -> SuiteMetrics:
+    """Evaluate a test suite glob pattern over multiple runs to estimate flakiness.
+
+    With a `store`, the per-test coverage map of the suite is persisted after
+    the run. With `affected_only`, that map is used to rerun only the tests
+    affected by source/test changes since then; results for everything else
+    are carried forward from the previous run of the suite. If there is no
+    previous map yet, the whole suite is evaluated.
+    """
+    test_paths = [Path(p).as_posix() for p in Path(".").glob(test_glob)]
+    if not test_paths:
+        raise ValueError(f"No tests matched pattern {test_glob}")
+
+    if affected_only:
+        if store is None:
+            raise ValueError("affected_only evaluation needs a results store")
+        metrics = _evaluate_affected(name, test_paths, runs, store, queue)
+        if metrics is not None:
+            return metrics
+
+    exit_codes, per_run_outcomes = _run_suite(name, test_paths, runs, queue)
+    passes = sum(1 for code in exit_codes if code == 0)
+    failures = len(exit_codes) - passes
+
+    data = _load_coverage_json()
+    cov = _compute_coverage(data)
+    test_outcomes = _merge_test_outcomes(per_run_outcomes)
+    if store is not None:
+        store.save_impact_map(name, build_impact_map(data, [t.test_id for t in test_outcomes], test_paths))
 
     return SuiteMetrics(
         name=name,
@@ -96,12 +416,31 @@ def evaluate_suite(name: str, test_glob: str, runs: int = 5) -> SuiteMetrics:
         runs=runs,
         passes=passes,
         failures=failures,
-        flaky_tests=flakiness_events,  # coarse approximation
+        flaky_tests=_flakiness_events([code == 0 for code in exit_codes]),  # coarse approximation
         coverage_statement=cov["statement"],
         coverage_branch=cov["branch"],
+        test_outcomes=test_outcomes,
+        file_coverage=cov["files"],
     )
 
 
-def save_metrics(metrics: SuiteMetrics, output_path: str) -> None:
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    Path(output_path).write_text(json.dumps(asdict(metrics), indent=2), encoding="utf-8")
+def save_metrics(
+    metrics: SuiteMetrics,
+    output_path: Optional[str] = None,
+    run_id: Optional[int] = None,
+    store: Optional[ResultsStore] = None,
+) -> int:
+    """Record suite metrics in the results store and return the run id used.
+
+    A new ``"evaluation"`` run is opened when ``run_id`` is not given. Passing
+    ``output_path`` additionally writes a JSON snapshot (e.g. for plotting).
+    """
+    with use_store(store) as s:
+        if run_id is None:
+            run_id = s.start_run("evaluation")
+        s.record_suite(run_id, metrics)
+
+    if output_path is not None:
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        Path(output_path).write_text(json.dumps(asdict(metrics), indent=2), encoding="utf-8")
+    return run_id
@@ -3,11 +3,14 @@
 from __future__ import annotations
 
 import ast
+import hashlib
+import json
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
 
-from .config import GEMINI_API_KEY, GEMINI_MODEL_NAME, FORBIDDEN_IMPORTS
+from .config import GEMINI_API_KEY, GEMINI_MODEL_NAME, FORBIDDEN_IMPORTS, GENERATION_CACHE_DIR
 from .prompt_templates import build_test_generation_prompt
 
 import google.generativeai as genai  # make import errors visible
@@ -19,6 +22,12 @@ class GenerationResult:
     output_path: Path
     used_dummy: bool  # always False now
     violations: List[str]
+    model: str = GEMINI_MODEL_NAME
+    prompt_chars: int = 0
+    response_chars: int = 0
+    duration_seconds: float = 0.0
+    tokens: int = 0
+    cached: bool = False
 PATH_BOOTSTRAP = """import sys
 from pathlib import Path
 
@@ -35,8 +44,18 @@ def _discover_functions(module_path: Path) -> List[ast.FunctionDef]:
     return [node for node in tree.body if isinstance(node, ast.FunctionDef)]
 
 
+def _estimate_tokens(text: str) -> int:
+    # Rough rule of thumb for English text and code: ~4 characters per token.
+    return (len(text) + 3) // 4
+
+
 def _call_gemini(prompt: str) -> str:
     """Call Gemini with the given prompt and return raw text."""
+    return _call_gemini_with_usage(prompt)[0]
+
+
+def _call_gemini_with_usage(prompt: str) -> Tuple[str, int]:
+    """Call Gemini and return ``(raw text, total tokens used)``."""
     if not GEMINI_API_KEY:
         raise RuntimeError(
             "GEMINI_API_KEY is not configured. "
@@ -46,8 +65,34 @@ def _call_gemini(prompt: str) -> str:
     genai.configure(api_key=GEMINI_API_KEY)
     model = genai.GenerativeModel(GEMINI_MODEL_NAME)
     response = model.generate_content(prompt)
-    text = response.text or ""
-    return text.strip()
+    text = (response.text or "").strip()
+    usage = getattr(response, "usage_metadata", None)
+    tokens = getattr(usage, "total_token_count", 0) or _estimate_tokens(prompt) + _estimate_tokens(text)
+    return text, tokens
+
+
+def call_model_cached(prompt: str, cache_dir: str = GENERATION_CACHE_DIR) -> Tuple[str, int, bool]:
+    """Call the model, reusing an earlier response to the identical prompt if there is one.
+
+    Returns ``(raw text, tokens spent, cache hit)``; cache hits cost no tokens.
+    """
+    key = hashlib.sha256(f"{GEMINI_MODEL_NAME}\n{prompt}".encode("utf-8")).hexdigest()
+    cache_path = Path(cache_dir) / f"{key}.json"
+    if cache_path.exists():
+        return json.loads(cache_path.read_text(encoding="utf-8"))["text"], 0, True
+
+    text, tokens = _call_gemini_with_usage(prompt)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps({"text": text, "tokens": tokens}), encoding="utf-8")
+    return text, tokens, False
+
+
+def strip_code_fences(raw_code: str) -> str:
+    """Basic sanitation: strip markdown fences if present."""
+    for fence in ("```python", "```py", "```"):
+        if fence in raw_code:
+            raw_code = raw_code.replace(fence, "")
+    return raw_code.strip()
 
 
 def _detect_forbidden_imports(code: str) -> List[str]:
@@ -84,13 +129,12 @@ def generate_tests_for_module(module_path: str, output_dir: str = "tests/generat
         )
 
     full_prompt = "\n\n".join(prompt_parts)
-    raw_code = _call_gemini(full_prompt)
+    start = time.time()
+    raw_code, tokens = _call_gemini_with_usage(full_prompt)
+    duration = time.time() - start
+    response_chars = len(raw_code)
 
-    # Basic sanitation: strip markdown fences if present.
-    for fence in ("```python", "```py", "```"):
-        if fence in raw_code:
-            raw_code = raw_code.replace(fence, "")
-    raw_code = raw_code.strip()
+    raw_code = strip_code_fences(raw_code)
 
     violations = _detect_forbidden_imports(raw_code)
 
@@ -106,4 +150,8 @@ def generate_tests_for_module(module_path: str, output_dir: str = "tests/generat
         output_path=output_path,
         used_dummy=False,   # <- we always say False now
         violations=violations,
+        prompt_chars=len(full_prompt),
+        response_chars=response_chars,
+        duration_seconds=duration,
+        tokens=tokens,
     )
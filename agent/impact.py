@@ -0,0 +1,360 @@
+"""Change-based test impact analysis.
+
+After every evaluation we keep an :class:`ImpactMap`: which source lines each
+test executed (from coverage's per-test contexts), plus the contents of the
+source and test files at that moment. On the next ``--affected-only``
+evaluation the current files are compared with that snapshot:
+
+- a test file that is new or edited is rerun as a whole;
+- tests whose file disappeared are dropped;
+- a test is rerun if it executed a line inside a function whose source
+  changed, or any line of a source file whose module-level code changed
+  or that was deleted;
+- a source file that is new counts as changed (no test ran it yet), so
+  coverage is measured again and includes it;
+- every other test keeps its previous outcome, and its covered lines are
+  shifted to their new line numbers so coverage can be carried forward.
+
+Functions are identified by qualified name, so moving a function around in
+a file does not by itself make its tests affected.
+"""
+
+from __future__ import annotations
+
+import ast
+import difflib
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Coverage context of lines executed while modules are imported (test collection).
+IMPORT_CONTEXT = ""
+MODULE_SCOPE = "<module>"
+
+_PARAM_SUFFIX = re.compile(r"\[.*\]$")
+
+
+@dataclass
+class ImpactMap:
+    # test key (pytest node id without parametrization) -> test file
+    tests: Dict[str, str] = field(default_factory=dict)
+    # test key (or IMPORT_CONTEXT) -> source path -> executed line numbers
+    lines: Dict[str, Dict[str, Set[int]]] = field(default_factory=dict)
+    # source path -> contents when the map was taken
+    sources: Dict[str, str] = field(default_factory=dict)
+    # test file -> contents when the map was taken
+    test_files: Dict[str, str] = field(default_factory=dict)
+    # source path -> executed branch arcs (coverage does not split these per test)
+    arcs: Dict[str, Set[Tuple[int, int]]] = field(default_factory=dict)
+
+
+@dataclass
+class ImpactSelection:
+    rerun_tests: List[str]  # test keys to rerun individually
+    rerun_files: List[str]  # new or edited test files, rerun as a whole
+    removed_tests: Set[str]  # test keys whose previous results must be dropped
+    changed_sources: Set[str]  # source files that were added, edited or deleted
+    line_maps: Dict[str, Dict[int, int]]  # old -> new line numbers of edited sources
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.rerun_tests or self.rerun_files or self.removed_tests or self.changed_sources)
+
+
+def node_key(test_id: str) -> str:
+    """Strip the parametrization suffix: coverage only knows about test functions."""
+    return _PARAM_SUFFIX.sub("", test_id)
+
+
+def _test_file(key: str) -> str:
+    return key.split("::", 1)[0]
+
+
+def _context_names(key: str) -> List[str]:
+    """Coverage ``test_function`` context names a pytest node id may show up as."""
+    file, *parts = key.split("::")
+    path = Path(file).with_suffix("")
+    return [".".join([path.name, *parts]), ".".join([*path.parts, *parts])]
+
+
+def _function_scopes(source: str) -> Tuple[Dict[str, str], Dict[int, str], List[str]]:
+    """Split ``source`` into function scopes.
+
+    Returns the source text of every function (by qualified name), the
+    innermost function owning each line, and the remaining module-level lines
+    with blanks and comments removed.
+    """
+    lines = source.splitlines()
+    segments: Dict[str, str] = {}
+    owner: Dict[int, str] = {}
+
+    def visit(node: ast.AST, prefix: str) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                name = f"{prefix}{child.name}"
+                start = min([child.lineno] + [d.lineno for d in child.decorator_list])
+                end = child.end_lineno or child.lineno
+                segments[name] = segments.get(name, "") + "\n".join(lines[start - 1 : end]) + "\n"
+                for line in range(start, end + 1):
+                    owner[line] = name
+                visit(child, f"{name}.<locals>.")
+            elif isinstance(child, ast.ClassDef):
+                visit(child, f"{prefix}{child.name}.")
+            else:
+                visit(child, prefix)
+
+    visit(ast.parse(source), "")
+    module_lines = [
+        text.strip()
+        for number, text in enumerate(lines, start=1)
+        if number not in owner and text.strip() and not text.strip().startswith("#")
+    ]
+    return segments, owner, module_lines
+
+
+def line_scopes(source: str) -> Dict[int, str]:
+    """Map line numbers to the qualified name of the innermost enclosing function."""
+    try:
+        return _function_scopes(source)[1]
+    except SyntaxError:
+        return {}
+
+
+def _line_map(old: str, new: str) -> Dict[int, int]:
+    matcher = difflib.SequenceMatcher(None, old.splitlines(), new.splitlines(), autojunk=False)
+    mapping: Dict[int, int] = {}
+    for tag, i1, i2, j1, _j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for offset in range(i2 - i1):
+                mapping[i1 + offset + 1] = j1 + offset + 1
+    return mapping
+
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+def source_files(source_dirs: Iterable[str], root: Path = Path(".")) -> List[str]:
+    """Python files coverage measures for ``[tool.coverage.run] source`` dirs.
+
+    Like coverage, subdirectories are only searched when they are packages.
+    """
+    found: List[str] = []
+    for source_dir in source_dirs:
+        top = root / source_dir
+
+        def walk(directory: Path) -> None:
+            for entry in sorted(directory.iterdir()):
+                if entry.is_dir():
+                    if (entry / "__init__.py").is_file():
+                        walk(entry)
+                elif entry.suffix == ".py":
+                    found.append(entry.relative_to(root).as_posix())
+
+        if top.is_dir():
+            walk(top)
+    return found
+
+
+def build_impact_map(
+    coverage_data: Dict[str, Any],
+    test_ids: Iterable[str],
+    test_paths: Iterable[str],
+    root: Path = Path("."),
+) -> ImpactMap:
+    """Build an impact map from ``coverage json --show-contexts`` output.
+
+    Coverage must have been collected with ``dynamic_context = test_function``
+    (see ``pyproject.toml``).
+    """
+    impact_map = ImpactMap()
+    by_context: Dict[str, str] = {}
+    for test_id in test_ids:
+        key = node_key(test_id)
+        impact_map.tests[key] = _test_file(key)
+        for name in _context_names(key):
+            by_context[name] = key
+
+    for raw_path, info in coverage_data.get("files", {}).items():
+        path = Path(raw_path).as_posix()
+        text = _read(root / path)
+        if text is None:
+            continue
+        impact_map.sources[path] = text
+        impact_map.arcs[path] = {(a, b) for a, b in info.get("executed_branches", [])}
+        for line, contexts in info.get("contexts", {}).items():
+            for context in contexts:
+                key = IMPORT_CONTEXT if context == "" else by_context.get(context)
+                if key is not None:
+                    impact_map.lines.setdefault(key, {}).setdefault(path, set()).add(int(line))
+
+    for test_path in test_paths:
+        path = Path(test_path).as_posix()
+        text = _read(root / path)
+        if text is not None:
+            impact_map.test_files[path] = text
+    return impact_map
+
+
+def select_affected_tests(
+    impact_map: ImpactMap,
+    test_paths: Iterable[str],
+    root: Path = Path("."),
+    source_paths: Iterable[str] = (),
+) -> ImpactSelection:
+    """Compare the current files with ``impact_map`` and decide what must be rerun.
+
+    ``source_paths`` are the source files coverage currently measures (see
+    :func:`source_files`); any that are not in the map yet are new.
+    """
+    current_files = {Path(p).as_posix() for p in test_paths}
+    rerun_files = sorted(
+        f for f in current_files if impact_map.test_files.get(f) != _read(root / f)
+    )
+    removed = {
+        key for key, f in impact_map.tests.items() if f not in current_files or f in rerun_files
+    }
+
+    changed: Set[str] = set()
+    line_maps: Dict[str, Dict[int, int]] = {}
+    owners: Dict[str, Dict[int, str]] = {}
+    # None means "the whole file is dirty"
+    dirty: Dict[str, Optional[Set[str]]] = {}
+    for path, old in impact_map.sources.items():
+        new = _read(root / path)
+        if new == old:
+            continue
+        changed.add(path)
+        if new is None:
+            dirty[path] = None
+            continue
+        line_maps[path] = _line_map(old, new)
+        try:
+            old_segments, owners[path], old_module = _function_scopes(old)
+            new_segments, _, new_module = _function_scopes(new)
+        except SyntaxError:
+            dirty[path] = None
+            continue
+        if old_module != new_module:
+            dirty[path] = None
+        else:
+            dirty[path] = {name for name, text in old_segments.items() if new_segments.get(name) != text}
+    for path in source_paths:
+        path = Path(path).as_posix()
+        if path not in impact_map.sources:
+            # No test executed a new file, so none is affected by it.
+            changed.add(path)
+            dirty[path] = set()
+
+    affected: Set[str] = set()
+    for key, files in impact_map.lines.items():
+        if key == IMPORT_CONTEXT or key in removed:
+            continue
+        for path, lines in files.items():
+            if path not in changed:
+                continue
+            scopes = dirty[path]
+            if scopes is None:
+                affected.add(key)
+                break
+            owner = owners[path]
+            mapping = line_maps[path]
+            # A line that cannot be placed in the new file is treated as changed.
+            if any(owner.get(line, MODULE_SCOPE) in scopes or line not in mapping for line in lines):
+                affected.add(key)
+                break
+
+    return ImpactSelection(
+        rerun_tests=sorted(affected),
+        rerun_files=rerun_files,
+        removed_tests=removed,
+        changed_sources=changed,
+        line_maps=line_maps,
+    )
+
+
+def update_impact_map(
+    previous: ImpactMap,
+    selection: ImpactSelection,
+    fresh: ImpactMap,
+) -> ImpactMap:
+    """Combine the carried-forward part of ``previous`` with a ``fresh`` partial run."""
+    updated = ImpactMap()
+    rerun = set(selection.rerun_tests)
+
+    def shift(path: str, line: int) -> Optional[int]:
+        if path not in selection.changed_sources:
+            return line
+        return selection.line_maps.get(path, {}).get(line)
+
+    def carry(files: Dict[str, Set[int]]) -> Dict[str, Set[int]]:
+        result: Dict[str, Set[int]] = {}
+        for path, lines in files.items():
+            shifted = {shift(path, line) for line in lines}
+            shifted.discard(None)
+            if shifted:
+                result[path] = shifted  # type: ignore[assignment]
+        return result
+
+    for key, test_file in previous.tests.items():
+        if key in selection.removed_tests or key in rerun:
+            continue
+        updated.tests[key] = test_file
+        updated.lines[key] = carry(previous.lines.get(key, {}))
+
+    # Lines carried forward together with the tests that still exercise them.
+    carried: Dict[str, Set[int]] = {}
+    for files in updated.lines.values():
+        for path, lines in files.items():
+            carried.setdefault(path, set()).update(lines)
+
+    # Import-time lines only stay covered while some carried test still uses the module.
+    imports = {
+        path: lines
+        for path, lines in carry(previous.lines.get(IMPORT_CONTEXT, {})).items()
+        if path in carried
+    }
+    for path, lines in fresh.lines.get(IMPORT_CONTEXT, {}).items():
+        imports[path] = imports.get(path, set()) | lines
+    for path, lines in imports.items():
+        carried.setdefault(path, set()).update(lines)
+    updated.lines[IMPORT_CONTEXT] = imports
+
+    # Branch arcs are kept when their starting line is still executed by a carried test.
+    for path, arcs in previous.arcs.items():
+        kept: Set[Tuple[int, int]] = set()
+        for a, b in arcs:
+            new_a = shift(path, abs(a))
+            new_b = shift(path, abs(b))
+            if new_a is None or new_b is None or new_a not in carried.get(path, set()):
+                continue
+            kept.add((new_a if a > 0 else -new_a, new_b if b > 0 else -new_b))
+        if kept:
+            updated.arcs[path] = kept
+    for path, arcs in fresh.arcs.items():
+        updated.arcs[path] = updated.arcs.get(path, set()) | arcs
+
+    for key, test_file in fresh.tests.items():
+        updated.tests[key] = test_file
+        updated.lines[key] = fresh.lines.get(key, {})
+
+    updated.sources = {
+        path: text
+        for path, text in previous.sources.items()
+        if path not in selection.changed_sources
+    }
+    updated.sources.update(fresh.sources)
+    updated.test_files = dict(fresh.test_files)
+    return updated
+
+
+def covered_lines(impact_map: ImpactMap, path: str) -> Set[int]:
+    """All lines of ``path`` executed by any test in the map (or at import time)."""
+    covered: Set[int] = set()
+    for files in impact_map.lines.values():
+        covered |= files.get(path, set())
+    return covered
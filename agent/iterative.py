@@ -0,0 +1,448 @@
+"""Feedback-driven test generation rounds.
+
+One-shot generation asks the model for tests for every function at once. The
+iterative mode instead measures the generated suite after each round and only
+goes back to the model for functions that still have uncovered lines or
+branches, or surviving mutants, with a prompt that lists exactly those gaps.
+
+Work is reused between rounds:
+
+- mutants killed in an earlier round stay killed (tests are only ever added),
+  so only the survivors are rerun;
+- the measurement taken to validate a round's new tests is reused as the next
+  round's feedback when no tests had to be dropped;
+- model responses are cached by prompt, so an interrupted or repeated session
+  does not pay for the same prompt twice;
+- tests of the starting file that fail on the unmodified module are marked
+  skip before the first round, so mutants are never "killed" by a broken test;
+- new tests that fail, or that are slower than the per-test budget, are
+  dropped before they reach mutation analysis;
+- a function whose gaps did not shrink after being targeted is not targeted
+  again.
+
+The loop stops when the coverage and mutation-score targets are met, when the
+token or time budget runs out, or after ``max_rounds``.
+"""
+
+from __future__ import annotations
+
+import ast
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .config import PER_TEST_BUDGET_SECONDS
+from .evaluation import SuiteMetrics, evaluate_suite
+from .impact import node_key
+from .generator import (
+    GenerationResult,
+    _detect_forbidden_imports,
+    _discover_functions,
+    call_model_cached,
+    generate_tests_for_module,
+    strip_code_fences,
+)
+from .mutation import MutantOutcome, MutationMetrics, compute_mutation_score
+from .prompt_templates import build_targeted_test_prompt
+from .sandbox_runner import quarantine_tests
+
+
+@dataclass
+class FunctionFeedback:
+    name: str
+    missing_lines: List[int]
+    missing_branches: List[Tuple[int, int]]
+    surviving_mutants: List[MutantOutcome]
+
+    @property
+    def gap_count(self) -> int:
+        return len(self.missing_lines) + len(self.missing_branches) + len(self.surviving_mutants)
+
+
+@dataclass
+class RoundReport:
+    round: int
+    coverage_statement: float
+    coverage_branch: float
+    mutation_score: Optional[float]
+    targeted_functions: List[str]
+    added_tests: int
+    dropped_tests: int
+    model_calls: int
+    cache_hits: int
+    tokens: int
+    seconds: float
+
+
+@dataclass
+class IterativeGenerationResult:
+    module_path: Path
+    output_path: Path
+    rounds: List[RoundReport]
+    stop_reason: str
+    tokens_used: int
+    model_calls: int
+    calls: List[GenerationResult] = field(default_factory=list)
+    violations: List[str] = field(default_factory=list)
+    # tests of the starting file marked skip because they fail on the unmodified module
+    quarantined_tests: List[str] = field(default_factory=list)
+
+
+def _relative(path: Path) -> str:
+    return Path(os.path.relpath(path.resolve(), Path.cwd())).as_posix()
+
+
+def _is_test_class(node: ast.stmt) -> bool:
+    return isinstance(node, ast.ClassDef) and node.name.startswith("Test")
+
+
+def _is_test_function(node: ast.stmt) -> bool:
+    return isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test")
+
+
+def _test_names(code: str) -> List[str]:
+    """Test ids within the file as pytest spells them: ``test_x`` or ``TestX::test_y``."""
+    names: List[str] = []
+    for node in ast.parse(code).body:
+        if _is_test_function(node):
+            names.append(node.name)
+        elif _is_test_class(node):
+            names.extend(f"{node.name}::{item.name}" for item in node.body if _is_test_function(item))
+    return names
+
+
+def _local_test_id(test_id: str, test_file: str) -> Optional[str]:
+    """Strip the file part (and parametrization) off a node id; None if it belongs elsewhere."""
+    key = node_key(test_id)
+    prefix = f"{test_file}::"
+    return key[len(prefix) :] if key.startswith(prefix) else None
+
+
+def _collection_failed(suite: SuiteMetrics, test_file: str) -> bool:
+    """True when pytest could not even collect ``test_file`` (nothing ran, or a module-level error)."""
+    if not suite.test_outcomes:
+        return True
+    # Collection errors are reported under the module, not under a test of the file.
+    return any(
+        t.outcome == "error" and _local_test_id(t.test_id, test_file) is None for t in suite.test_outcomes
+    )
+
+
+def _function_code_lines(func: ast.FunctionDef) -> Set[int]:
+    """Lines of a function body, without its docstring (mutants there are not killable)."""
+    lines = set(range(func.lineno, (func.end_lineno or func.lineno) + 1))
+    if (
+        func.body
+        and isinstance(func.body[0], ast.Expr)
+        and isinstance(func.body[0].value, ast.Constant)
+        and isinstance(func.body[0].value.value, str)
+    ):
+        doc = func.body[0]
+        lines -= set(range(doc.lineno, (doc.end_lineno or doc.lineno) + 1))
+    return lines
+
+
+def collect_function_feedback(
+    module: Path,
+    suite: SuiteMetrics,
+    mutation: Optional[MutationMetrics],
+) -> List[FunctionFeedback]:
+    """Attribute uncovered lines/branches and surviving mutants to the module's top-level functions."""
+    module_rel = _relative(module)
+    coverage = next((f for f in suite.file_coverage if f.path == module_rel), None)
+    missing_lines = set(coverage.missing_lines) if coverage else set()
+    missing_branches = list(coverage.missing_branches) if coverage else []
+    survivors = [m for m in mutation.mutants if not m.killed] if mutation else []
+
+    feedback: List[FunctionFeedback] = []
+    for func in _discover_functions(module):
+        code_lines = _function_code_lines(func)
+        feedback.append(
+            FunctionFeedback(
+                name=func.name,
+                missing_lines=sorted(missing_lines & code_lines),
+                missing_branches=[arc for arc in missing_branches if arc[0] in code_lines],
+                surviving_mutants=[m for m in survivors if m.line in code_lines],
+            )
+        )
+    return feedback
+
+
+def _describe_gaps(source_lines: List[str], fb: FunctionFeedback) -> Tuple[List[str], List[str]]:
+    def text(line: int) -> str:
+        return source_lines[line - 1].strip() if 0 < line <= len(source_lines) else ""
+
+    uncovered = [f"line {line}: {text(line)}" for line in fb.missing_lines]
+    for a, b in fb.missing_branches:
+        target = "the function exits" if b < 0 else f"line {b} ({text(b)})"
+        uncovered.append(f"branch from line {a} ({text(a)}) to {target} is never taken")
+    mutants = [
+        f"line {m.line}: `{m.original}` replaced by `{m.replacement}` in: {text(m.line)}"
+        for m in fb.surviving_mutants
+    ]
+    return uncovered, mutants
+
+
+def _unique_name(name: str, taken: Set[str], round_no: int) -> str:
+    new_name = f"{name}_r{round_no}"
+    suffix = 2
+    while new_name in taken:
+        new_name = f"{name}_r{round_no}_{suffix}"
+        suffix += 1
+    return new_name
+
+
+def _rename_duplicates(code: str, taken: Set[str], round_no: int) -> str:
+    """Give generated tests and test classes that clash with existing names a unique suffix.
+
+    ``taken`` holds test ids as returned by :func:`_test_names` and is updated
+    with the ids of the (renamed) code.
+    """
+    lines = code.splitlines()
+    for node in ast.parse(code).body:
+        if _is_test_function(node):
+            name = node.name
+            if name in taken:
+                name = _unique_name(name, taken, round_no)
+                lines[node.lineno - 1] = lines[node.lineno - 1].replace(f"def {node.name}(", f"def {name}(", 1)
+            taken.add(name)
+        elif _is_test_class(node):
+            # A second class of the same name would replace the first one, tests and all.
+            name = node.name
+            in_use = {test_id.split("::", 1)[0] for test_id in taken if "::" in test_id}
+            if name in in_use:
+                name = _unique_name(name, in_use, round_no)
+                lines[node.lineno - 1] = lines[node.lineno - 1].replace(f"class {node.name}", f"class {name}", 1)
+            taken.update(f"{name}::{item.name}" for item in node.body if _is_test_function(item))
+    return "\n".join(lines)
+
+
+def _remove_tests(output_path: Path, names: Set[str]) -> None:
+    """Delete the tests with the given ids (see :func:`_test_names`) from the file."""
+    code = output_path.read_text(encoding="utf-8")
+    drop: Set[int] = set()
+
+    def span(node: ast.stmt) -> Set[int]:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        return set(range(start, (node.end_lineno or node.lineno) + 1))
+
+    for node in ast.parse(code).body:
+        if _is_test_function(node) and node.name in names:
+            drop |= span(node)
+        elif _is_test_class(node):
+            doomed = [item for item in node.body if _is_test_function(item) and f"{node.name}::{item.name}" in names]
+            if len(doomed) == len(node.body):
+                drop |= span(node)  # an empty class body would not parse
+            for item in doomed:
+                drop |= span(item)
+    kept = [line for number, line in enumerate(code.splitlines(), start=1) if number not in drop]
+    output_path.write_text("\n".join(kept) + "\n", encoding="utf-8")
+
+
+def generate_tests_iteratively(
+    module_path: str,
+    output_dir: str = "tests/generated",
+    coverage_target: float = 0.9,
+    mutation_target: Optional[float] = 0.8,
+    max_rounds: int = 5,
+    token_budget: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> IterativeGenerationResult:
+    """Generate tests in feedback rounds until the targets or a budget are reached.
+
+    An existing generated test file for the module is used as the starting
+    point; otherwise a one-shot generation creates it first. Coverage targets
+    refer to statement coverage of `module_path` only. Pass
+    `mutation_target=None` to skip mutation analysis entirely.
+    """
+    start = time.time()
+    module = Path(module_path)
+    if not module.exists():
+        raise FileNotFoundError(module)
+
+    output_path = Path(output_dir) / f"test_{module.stem}_generated.py"
+    calls: List[GenerationResult] = []
+    violations: List[str] = []
+    tokens_used = 0
+
+    if not output_path.exists():
+        initial = generate_tests_for_module(module_path, output_dir)
+        calls.append(initial)
+        tokens_used += initial.tokens
+        violations.extend(initial.violations)
+
+    module_source = module.read_text(encoding="utf-8")
+    source_lines = module_source.splitlines()
+    functions = {func.name: func for func in _discover_functions(module)}
+    test_glob = _relative(output_path)
+    module_rel = _relative(module)
+
+    known_killed: Set[int] = set()
+    stalled: Set[str] = set()
+    last_targeted: Dict[str, int] = {}
+    rounds: List[RoundReport] = []
+    stop_reason = f"reached max_rounds ({max_rounds})"
+
+    # Tests of the starting file that already fail on the unmodified module
+    # would make every mutant look killed, so they are skipped up front.
+    suite: Optional[SuiteMetrics] = evaluate_suite("generated", test_glob, runs=1)
+    quarantined: List[str] = []
+    if _collection_failed(suite, test_glob):
+        stop_reason = "the starting test file could not be collected"
+        max_rounds = 0  # nothing can be measured, so there is nothing to refine
+    else:
+        failing = [t.test_id for t in suite.test_outcomes if t.outcome in ("failed", "error")]
+        if failing:
+            quarantined = quarantine_tests(str(output_path), failing, "fails on the unmodified module")
+            suite = None  # measure again without them
+
+    def out_of_budget() -> Optional[str]:
+        if token_budget is not None and tokens_used >= token_budget:
+            return f"token budget exhausted ({tokens_used}/{token_budget})"
+        if time_budget is not None and time.time() - start >= time_budget:
+            return f"time budget exhausted ({time.time() - start:.0f}s/{time_budget:.0f}s)"
+        return None
+
+    for round_no in range(1, max_rounds + 1):
+        round_start = time.time()
+        if suite is None:
+            suite = evaluate_suite("generated", test_glob, runs=1)
+        mutation = None
+        if mutation_target is not None:
+            mutation = compute_mutation_score(
+                "generated", module, [str(output_path.resolve())], known_killed=known_killed
+            )
+            known_killed |= {m.mutant_id for m in mutation.mutants if m.killed}
+
+        module_cov = next((f for f in suite.file_coverage if f.path == module_rel), None)
+        coverage = module_cov.covered_lines / module_cov.num_statements if module_cov and module_cov.num_statements else 0.0
+        branch = module_cov.covered_branches / module_cov.num_branches if module_cov and module_cov.num_branches else 0.0
+        report = RoundReport(
+            round=round_no,
+            coverage_statement=coverage,
+            coverage_branch=branch,
+            mutation_score=mutation.mutation_score if mutation else None,
+            targeted_functions=[],
+            added_tests=0,
+            dropped_tests=0,
+            model_calls=0,
+            cache_hits=0,
+            tokens=0,
+            seconds=0.0,
+        )
+        rounds.append(report)
+
+        coverage_met = coverage >= coverage_target
+        mutation_met = mutation is None or mutation.mutation_score >= (mutation_target or 0.0)
+        budget_reason = out_of_budget()
+        if (coverage_met and mutation_met) or budget_reason:
+            stop_reason = budget_reason or "targets met"
+            report.seconds = time.time() - round_start
+            break
+
+        # Pick the functions that still have gaps relevant to an unmet target.
+        needy: List[FunctionFeedback] = []
+        for fb in collect_function_feedback(module, suite, mutation):
+            if fb.name in stalled:
+                continue
+            if fb.name in last_targeted and fb.gap_count >= last_targeted[fb.name]:
+                stalled.add(fb.name)
+                continue
+            if not coverage_met and (fb.missing_lines or fb.missing_branches):
+                needy.append(fb)
+            elif not mutation_met and fb.surviving_mutants:
+                needy.append(fb)
+        if not needy:
+            stop_reason = "no function has gaps left that targeted prompts could close"
+            report.seconds = time.time() - round_start
+            break
+
+        before = output_path.read_text(encoding="utf-8")
+        taken = set(_test_names(before))
+        added: Set[str] = set()
+        for fb in needy:
+            if out_of_budget():
+                break
+            func = functions[fb.name]
+            uncovered, mutants = _describe_gaps(source_lines, fb)
+            prompt = build_targeted_test_prompt(
+                module_name=module.stem,
+                func_name=fb.name,
+                func_source=ast.get_source_segment(module_source, func) or "",
+                uncovered=uncovered,
+                surviving_mutants=mutants,
+                existing_tests=sorted(taken),
+            )
+            call_start = time.time()
+            raw_code, tokens, cached = call_model_cached(prompt)
+            tokens_used += tokens
+            report.tokens += tokens
+            report.model_calls += 0 if cached else 1
+            report.cache_hits += 1 if cached else 0
+            report.targeted_functions.append(fb.name)
+            last_targeted[fb.name] = fb.gap_count
+
+            code = strip_code_fences(raw_code)
+            found = _detect_forbidden_imports(code)
+            calls.append(
+                GenerationResult(
+                    module_path=module,
+                    output_path=output_path,
+                    used_dummy=False,
+                    violations=found,
+                    prompt_chars=len(prompt),
+                    response_chars=len(raw_code),
+                    duration_seconds=time.time() - call_start,
+                    tokens=tokens,
+                    cached=cached,
+                )
+            )
+            if found:
+                violations.extend(found)
+                continue
+            try:
+                names_before = set(taken)
+                code = _rename_duplicates(code, taken, round_no)
+            except SyntaxError:
+                continue
+            added |= taken - names_before
+            with output_path.open("a", encoding="utf-8") as fh:
+                fh.write(f"\n\n# --- round {round_no}: targeted tests for {fb.name} ---\n{code}\n")
+
+        report.added_tests = len(added)
+        # Validate the new tests on the unmutated module; failing ones would make
+        # every mutant look killed, and ones over the per-test budget would be
+        # paid for on every mutant, so both are dropped straight away.
+        suite = evaluate_suite("generated", test_glob, runs=1)
+        if _collection_failed(suite, test_glob):
+            # The file no longer collects (e.g. a bad import): undo the round.
+            output_path.write_text(before, encoding="utf-8")
+            report.dropped_tests = len(added)
+            suite = None
+        else:
+            rejected = set()
+            for t in suite.test_outcomes:
+                test_id = _local_test_id(t.test_id, test_glob)
+                if test_id in added and (
+                    t.outcome in ("failed", "error") or t.duration_seconds > PER_TEST_BUDGET_SECONDS
+                ):
+                    rejected.add(test_id)
+            if rejected:
+                _remove_tests(output_path, rejected)
+                report.dropped_tests = len(rejected)
+                suite = None  # measure again next round
+        report.seconds = time.time() - round_start
+
+    return IterativeGenerationResult(
+        module_path=module,
+        output_path=output_path,
+        rounds=rounds,
+        stop_reason=stop_reason,
+        tokens_used=tokens_used,
+        model_calls=sum(1 for c in calls if not c.cached),
+        calls=calls,
+        violations=violations,
+        quarantined_tests=quarantined,
+    )
@@ -0,0 +1,320 @@
+"""Job queue used to spread mutation and evaluation work over several workers.
+
+A *job* is a small JSON-serializable unit of work (e.g. "run these tests
+against mutant 42", or "rerun this suite once"). Jobs are grouped into a
+*batch*; the coordinator submits a batch, waits for it to drain and then
+aggregates the results.
+
+Workers *lease* jobs for a limited time. A worker that dies simply stops
+renewing its lease, and once the lease expires the job becomes available
+again, until it has been attempted ``max_attempts`` times. A coordinator
+waiting on a batch gives up once no worker has done anything anywhere in the
+queue for ``JOB_STALL_SECONDS``, so it cannot block forever when no worker is
+left, while a batch queued behind another coordinator's long batch keeps
+waiting as long as the workers are busy.
+
+:class:`SQLiteJobQueue` is the local stand-in: a single SQLite file that any
+number of worker processes can share, on one host or on several hosts that
+mount the same filesystem. Note that SQLite relies on the filesystem's
+locking, so the shared mount must support POSIX locks, and that lease
+expiry assumes host clocks are roughly in sync.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_QUEUE_PATH, JOB_STALL_SECONDS
+
+
+@dataclass
+class Job:
+    kind: str  # "mutant" or "rerun"
+    payload: Dict[str, Any]
+    batch: str = ""
+    job_id: Optional[int] = None
+    attempts: int = 0
+
+
+@dataclass
+class JobResult:
+    job: Job
+    status: str  # "done" or "failed"
+    result: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class JobQueue:
+    """Interface shared by all queue backends."""
+
+    def submit(self, batch: str, jobs: Iterable[Job]) -> int:
+        """Add jobs to ``batch`` and return how many were queued."""
+        raise NotImplementedError
+
+    def lease(self, worker_id: str, lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[Job]:
+        """Claim the next available job for ``worker_id``, or return None."""
+        raise NotImplementedError
+
+    def renew(self, job_id: int, worker_id: str, lease_seconds: float = JOB_LEASE_SECONDS) -> bool:
+        """Extend a lease that ``worker_id`` still holds."""
+        raise NotImplementedError
+
+    def complete(self, job_id: int, worker_id: str, result: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """Give a job back after an error; it is retried until ``max_attempts``."""
+        raise NotImplementedError
+
+    def counts(self, batch: Optional[str] = None) -> Dict[str, int]:
+        """Return the number of jobs per status, optionally for one batch."""
+        raise NotImplementedError
+
+    def results(self, batch: str) -> Iterator[JobResult]:
+        raise NotImplementedError
+
+    def expire_leases(self) -> int:
+        """Fail expired leases whose job has no attempts left; return how many.
+
+        Called from :meth:`wait` as well as from :meth:`lease`, so a batch
+        still finishes when every worker has died.
+        """
+        raise NotImplementedError
+
+    def last_activity(self, batch: str) -> Optional[float]:
+        """Time of the latest submit to ``batch``, or of the latest lease,
+        renewal or result of any job in the queue.
+        """
+        raise NotImplementedError
+
+    def wait(
+        self,
+        batch: str,
+        poll_interval: float = 0.5,
+        timeout: Optional[float] = None,
+        stall_timeout: Optional[float] = JOB_STALL_SECONDS,
+    ) -> List[JobResult]:
+        """Block until every job in ``batch`` is done or failed, then return the results.
+
+        Raises TimeoutError after ``timeout`` seconds, or once no worker has
+        leased, renewed or finished a job of any batch for ``stall_timeout``
+        seconds (counted from the submit at the earliest), e.g. because no
+        worker is running.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            self.expire_leases()
+            counts = self.counts(batch)
+            if not counts.get("pending") and not counts.get("leased"):
+                return list(self.results(batch))
+            now = time.time()
+            if deadline is not None and now > deadline:
+                raise TimeoutError(f"Batch {batch!r} did not finish in {timeout} seconds: {counts}")
+            last = self.last_activity(batch)
+            if stall_timeout is not None and last is not None and now - last > stall_timeout:
+                raise TimeoutError(
+                    f"No worker has worked on batch {batch!r} for {stall_timeout:.0f} seconds "
+                    f"(are any workers running?): {counts}"
+                )
+            time.sleep(poll_interval)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    batch TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker_id TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, lease_expires);
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs(batch, status);
+CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated_at);
+"""
+
+
+class SQLiteJobQueue(JobQueue):
+    """Job queue stored in a single SQLite file."""
+
+    def __init__(self, db_path: str | Path = JOB_QUEUE_PATH, max_attempts: int = JOB_MAX_ATTEMPTS) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        # so that two workers can never lease the same job.
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "SQLiteJobQueue":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _transaction(self) -> "_Immediate":
+        return _Immediate(self._conn)
+
+    def submit(self, batch: str, jobs: Iterable[Job]) -> int:
+        now = time.time()
+        with self._transaction():
+            cur = self._conn.executemany(
+                """
+                INSERT INTO jobs (batch, kind, payload, max_attempts, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                ((batch, job.kind, json.dumps(job.payload), self.max_attempts, now) for job in jobs),
+            )
+        return cur.rowcount
+
+    def lease(self, worker_id: str, lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[Job]:
+        now = time.time()
+        with self._transaction():
+            self._expire_leases(now)
+            row = self._conn.execute(
+                """
+                SELECT id, batch, kind, payload, attempts FROM jobs
+                WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                ORDER BY id
+                LIMIT 1
+                """,
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, batch, kind, payload, attempts = row
+            self._conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'leased', worker_id = ?, lease_expires = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+                """,
+                (worker_id, now + lease_seconds, now, job_id),
+            )
+        return Job(kind=kind, payload=json.loads(payload), batch=batch, job_id=job_id, attempts=attempts + 1)
+
+    def renew(self, job_id: int, worker_id: str, lease_seconds: float = JOB_LEASE_SECONDS) -> bool:
+        now = time.time()
+        with self._transaction():
+            cur = self._conn.execute(
+                """
+                UPDATE jobs SET lease_expires = ?, updated_at = ?
+                WHERE id = ? AND worker_id = ? AND status = 'leased'
+                """,
+                (now + lease_seconds, now, job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Dict[str, Any]) -> bool:
+        with self._transaction():
+            cur = self._conn.execute(
+                """
+                UPDATE jobs SET status = 'done', result = ?, error = NULL, updated_at = ?
+                WHERE id = ? AND worker_id = ? AND status = 'leased'
+                """,
+                (json.dumps(result), time.time(), job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        with self._transaction():
+            cur = self._conn.execute(
+                """
+                UPDATE jobs
+                SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+                    worker_id = NULL, lease_expires = NULL, error = ?, updated_at = ?
+                WHERE id = ? AND worker_id = ? AND status = 'leased'
+                """,
+                (error, time.time(), job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def _expire_leases(self, now: float) -> int:
+        # Leases held by dead workers that have used up their attempts are final.
+        cur = self._conn.execute(
+            """
+            UPDATE jobs SET status = 'failed', error = 'lease expired', updated_at = ?
+            WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts
+            """,
+            (now, now),
+        )
+        return cur.rowcount
+
+    def expire_leases(self) -> int:
+        with self._transaction():
+            return self._expire_leases(time.time())
+
+    def last_activity(self, batch: str) -> Optional[float]:
+        # Rows untouched by workers are still 'pending' with no attempts; only
+        # those of this batch count (its submit time). Walking the updated_at
+        # index newest first usually stops at the first row.
+        row = self._conn.execute(
+            """
+            SELECT updated_at FROM jobs
+            WHERE batch = ? OR status != 'pending' OR attempts > 0
+            ORDER BY updated_at DESC
+            LIMIT 1
+            """,
+            (batch,),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def counts(self, batch: Optional[str] = None) -> Dict[str, int]:
+        self.expire_leases()
+        if batch is None:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        else:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE batch = ? GROUP BY status", (batch,)
+            )
+        return {status: count for status, count in rows}
+
+    def results(self, batch: str) -> Iterator[JobResult]:
+        rows = self._conn.execute(
+            """
+            SELECT id, kind, payload, attempts, status, result, error FROM jobs
+            WHERE batch = ? AND status IN ('done', 'failed')
+            ORDER BY id
+            """,
+            (batch,),
+        )
+        for job_id, kind, payload, attempts, status, result, error in rows:
+            yield JobResult(
+                job=Job(kind=kind, payload=json.loads(payload), batch=batch, job_id=job_id, attempts=attempts),
+                status=status,
+                result=json.loads(result) if result else {},
+                error=error,
+            )
+
+
+class _Immediate:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT`` block that rolls back on errors."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def __enter__(self) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def failed_jobs(results: Iterable[JobResult]) -> List[Tuple[Job, Optional[str]]]:
+    """Return ``(job, error)`` for every job that exhausted its attempts."""
+    return [(r.job, r.error) for r in results if r.status == "failed"]
@@ -1,10 +1,16 @@
 from __future__ import annotations
+import hashlib
 import json
+import os
 import subprocess
+import uuid
 import sys
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
+
+from .job_queue import Job, JobQueue, JobResult, failed_jobs
+from .results_store import ResultsStore, use_store
 
 
 # Where your code + tests live (relative to this file)
@@ -15,6 +21,15 @@ BASELINE_TESTS = [str(PROJECT_ROOT / "tests" / "baseline" / "test_math_ops_basel
 GENERATED_TESTS = [str(PROJECT_ROOT / "tests" / "generated" / "test_math_ops_generated.py")]
 
 
+@dataclass
+class MutantOutcome:
+    mutant_id: int  # character offset of the mutation site in the original source
+    line: int
+    original: str
+    replacement: str
+    killed: bool
+
+
 @dataclass
 class MutationMetrics:
     suite_name: str
@@ -23,6 +38,7 @@ class MutationMetrics:
     killed: int
     survived: int
     mutation_score: float
+    mutants: List[MutantOutcome] = field(default_factory=list)
 
 
 # Simple character-level mutations: flip comparison and arithmetic operators.
@@ -72,10 +88,119 @@ def _make_mutant(source: str, index: int) -> str:
     return source[:index] + replacement + source[index + 1 :]
 
 
+def _mutant_outcome(source: str, index: int, killed: bool) -> MutantOutcome:
+    return MutantOutcome(
+        mutant_id=index,
+        line=source.count("\n", 0, index) + 1,
+        original=source[index],
+        replacement=_MUTATION_MAP[source[index]],
+        killed=killed,
+    )
+
+
+def _relative_to_root(path: str | Path) -> str:
+    p = Path(path).resolve()
+    try:
+        return p.relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return p.as_posix()
+
+
+def _source_digest(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def plan_mutation_jobs(
+    target_module: Path,
+    test_paths: List[str],
+    known_killed: Optional[Set[int]] = None,
+) -> List[Job]:
+    """Split a mutation analysis into one serializable job per mutant.
+
+    Paths in the payload are relative to the project root, so a worker can
+    replay the job inside its own copy of the project. Mutants listed in
+    `known_killed` get no job.
+    """
+    known_killed = known_killed or set()
+    target_module = target_module.resolve()
+    source = target_module.read_text(encoding="utf-8")
+    base_payload = {
+        "project_root": str(PROJECT_ROOT),
+        "target_module": _relative_to_root(target_module),
+        "source_sha256": _source_digest(source),
+        "test_paths": [_relative_to_root(p) for p in test_paths],
+    }
+    return [
+        Job(kind="mutant", payload={**base_payload, "mutant_id": idx})
+        for idx in _find_mutation_sites(source)
+        if idx not in known_killed
+    ]
+
+
+def run_mutant_job(payload: Dict[str, Any], workspace: Path) -> Dict[str, Any]:
+    """Execute one mutant job inside ``workspace`` (a private copy of the project).
+
+    Unlike :func:`compute_mutation_score`, this never touches the shared
+    checkout, so many workers can run mutants of the same module at once.
+    """
+    target = workspace / payload["target_module"]
+    source = target.read_text(encoding="utf-8")
+    if _source_digest(source) != payload["source_sha256"]:
+        raise RuntimeError(f"Workspace copy of {payload['target_module']} does not match the submitted source")
+
+    idx = payload["mutant_id"]
+    target.write_text(_make_mutant(source, idx), encoding="utf-8")
+    try:
+        # Mutants keep the file size and may share an mtime with the original,
+        # so stale bytecode must never be picked up.
+        env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+        cmd = [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", *payload["test_paths"]]
+        result = subprocess.run(
+            cmd,
+            cwd=workspace,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    finally:
+        target.write_text(source, encoding="utf-8")
+
+    return asdict(_mutant_outcome(source, idx, killed=result.returncode != 0))
+
+
+def _aggregate_mutation_results(
+    suite_name: str,
+    target_module: Path,
+    results: List[JobResult],
+    reused: List[MutantOutcome],
+) -> MutationMetrics:
+    failed = failed_jobs(results)
+    if failed:
+        details = ", ".join(f"mutant {job.payload['mutant_id']}: {error}" for job, error in failed)
+        raise RuntimeError(f"{len(failed)} mutation job(s) failed permanently ({details})")
+
+    fresh = [MutantOutcome(**r.result) for r in results]
+    mutants = sorted(fresh + reused, key=lambda m: m.mutant_id)
+    killed = sum(1 for m in mutants if m.killed)
+    total = len(mutants)
+    return MutationMetrics(
+        suite_name=suite_name,
+        target_module=str(target_module.resolve()),
+        total_mutants=total,
+        killed=killed,
+        survived=total - killed,
+        mutation_score=killed / total if total else 0.0,
+        mutants=mutants,
+    )
+
+
 def compute_mutation_score(
     suite_name: str,
     target_module: Path,
     test_paths: List[str],
+    queue: Optional[JobQueue] = None,
+    known_killed: Optional[Set[int]] = None,
 ) -> MutationMetrics:
     """
     Run a simple mutation analysis for a given test suite.
@@ -84,7 +209,22 @@ def compute_mutation_score(
     - write a mutated version of the file
     - run pytest on `test_paths`
     - consider non-zero exitcode => killed mutant
+
+    With a `queue`, each mutant is submitted as a job instead and this call
+    blocks until the workers have drained the batch.
+
+    `known_killed` lists mutant ids that an earlier analysis already saw
+    killed by a subset of `test_paths`' tests (e.g. before more tests were
+    appended). They are reported as killed without being rerun.
     """
+    known_killed = known_killed or set()
+    if queue is not None:
+        source = target_module.resolve().read_text(encoding="utf-8")
+        reused = [_mutant_outcome(source, idx, killed=True) for idx in _find_mutation_sites(source) if idx in known_killed]
+        batch = f"mutation-{suite_name}-{uuid.uuid4().hex[:12]}"
+        queue.submit(batch, plan_mutation_jobs(target_module, test_paths, known_killed))
+        return _aggregate_mutation_results(suite_name, target_module, queue.wait(batch), reused)
+
     target_module = target_module.resolve()
     source = target_module.read_text(encoding="utf-8")
 
@@ -92,6 +232,7 @@ def compute_mutation_score(
     total = len(mutation_sites)
     killed = 0
     survived = 0
+    mutants: List[MutantOutcome] = []
 
     if total == 0:
         return MutationMetrics(
@@ -104,15 +245,24 @@ def compute_mutation_score(
         )
 
     for idx in mutation_sites:
+        if idx in known_killed:
+            killed += 1
+            mutants.append(_mutant_outcome(source, idx, killed=True))
+            continue
+
         mutated = _make_mutant(source, idx)
         # Write mutated source
         target_module.write_text(mutated, encoding="utf-8")
 
         try:
-            cmd = [sys.executable, "-m", "pytest", *test_paths]
+            # Mutants keep the file size and may share an mtime with the original,
+            # so stale bytecode must never be picked up (see run_mutant_job).
+            env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+            cmd = [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", *test_paths]
             result = subprocess.run(
                 cmd,
                 cwd=PROJECT_ROOT,
+                env=env,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
@@ -121,6 +271,7 @@ def compute_mutation_score(
                 killed += 1
             else:
                 survived += 1
+            mutants.append(_mutant_outcome(source, idx, killed=result.returncode != 0))
         finally:
             # Restore original source *every time* to avoid cascading mutations
             target_module.write_text(source, encoding="utf-8")
@@ -134,6 +285,7 @@ def compute_mutation_score(
         killed=killed,
         survived=survived,
         mutation_score=score,
+        mutants=mutants,
     )
 
 
@@ -156,8 +308,27 @@ def real_mutation_metrics(name: str) -> Dict[str, Any]:
 
 # For backward compatibility if your existing code imports dummy_mutation_metrics:
 dummy_mutation_metrics = real_mutation_metrics
-def save_mutation_metrics(metrics: MutationMetrics, output_path: str) -> None:
-    from pathlib import Path
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    data = asdict(metrics)
-    Path(output_path).write_text(json.dumps(data, indent=2), encoding="utf-8")
\ No newline at end of file
+
+
+def save_mutation_metrics(
+    metrics: MutationMetrics,
+    output_path: Optional[str] = None,
+    run_id: Optional[int] = None,
+    store: Optional[ResultsStore] = None,
+) -> int:
+    """Record mutation metrics (and every mutant's outcome) in the results store.
+
+    Mirrors :func:`agent.evaluation.save_metrics`: a new ``"evaluation"`` run is
+    opened when ``run_id`` is not given, and ``output_path`` optionally writes a
+    JSON snapshot.
+    """
+    with use_store(store) as s:
+        if run_id is None:
+            run_id = s.start_run("evaluation")
+        s.record_mutation(run_id, metrics)
+
+    if output_path is not None:
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        data = asdict(metrics)
+        Path(output_path).write_text(json.dumps(data, indent=2), encoding="utf-8")
+    return run_id
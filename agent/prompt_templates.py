@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 from textwrap import dedent
+from typing import List
 
 def build_test_generation_prompt(module_name: str, func_name: str, func_source: str) -> str:
     """Build a prompt to ask the model to generate pytest tests for a function."""
@@ -24,3 +25,54 @@ def build_test_generation_prompt(module_name: str, func_name: str, func_source:
         Function source:
         {func_source}
     """)
+
+
+# Dedented once up front: the inserted blocks span several lines and must not
+# change the template's indentation (or be re-indented by it).
+_TARGETED_TEST_PROMPT = dedent("""\
+    You are an expert Python testing assistant.
+
+    An existing pytest file already tests the function below, but it misses
+    some behaviour. Write ADDITIONAL pytest tests that:
+    - Execute the uncovered lines and branches listed below.
+    - Fail if any of the listed mutations were applied to the function
+      (i.e. assert on the exact results the mutated code would get wrong).
+    - Import the function under test from its module.
+    - Use new, unique test function names (existing tests: {existing_text}).
+    - Avoid any network, file system, or subprocess operations.
+    - Be deterministic and fast to execute.
+
+    Only output valid Python code that can be appended to the existing test file.
+    Do not include explanations, markdown, or backticks.
+
+    Module: {module_name}
+    Function name: {func_name}
+
+    Function source:
+    {func_source}
+
+    Uncovered lines and branches:
+    {uncovered_text}
+
+    Surviving mutants (each one is a single change the current tests do not detect):
+    {mutants_text}
+""")
+
+
+def build_targeted_test_prompt(
+    module_name: str,
+    func_name: str,
+    func_source: str,
+    uncovered: List[str],
+    surviving_mutants: List[str],
+    existing_tests: List[str],
+) -> str:
+    """Build a follow-up prompt asking only for tests that close specific gaps in a function."""
+    return _TARGETED_TEST_PROMPT.format(
+        module_name=module_name,
+        func_name=func_name,
+        func_source=dedent(func_source).rstrip("\n"),
+        uncovered_text="\n".join(f"- {item}" for item in uncovered) or "- (none)",
+        mutants_text="\n".join(f"- {item}" for item in surviving_mutants) or "- (none)",
+        existing_text=", ".join(existing_tests) or "(none)",
+    )
@@ -0,0 +1,89 @@
+"""pytest plugin used by the sandbox runner to time and limit individual tests.
+
+Loaded with ``-p agent.pytest_budget``. It adds two options:
+
+- ``--test-durations-log=PATH``: append one JSON line per test phase to PATH
+  as soon as it finishes (plus a line when a test starts), so timings survive
+  even if the whole run is killed by the suite timeout;
+- ``--test-time-limit=SECONDS``: interrupt a test that runs longer than this
+  and fail it, so one runaway test cannot eat the suite budget. This uses
+  ``SIGALRM`` and therefore only works on POSIX systems; elsewhere tests are
+  only timed.
+"""
+
+from __future__ import annotations
+
+import json
+import signal
+import threading
+from typing import Any, Generator, Optional
+
+import pytest
+
+
+# The logging hooks below do not receive the config object, so keep it here.
+_CONFIG: dict = {}
+
+
+class TestTimeLimitExceeded(Exception):
+    """Raised inside a test that ran longer than ``--test-time-limit``."""
+
+    __test__ = False  # not a test class, despite the name
+
+
+def pytest_addoption(parser: Any) -> None:
+    group = parser.getgroup("sandbox budget")
+    group.addoption("--test-durations-log", default=None, help="Append per-test timings (JSON lines) to this file.")
+    group.addoption("--test-time-limit", type=float, default=0.0, help="Fail tests that run longer than this.")
+
+
+def _log(config: Any, record: dict) -> None:
+    path: Optional[str] = config.getoption("test_durations_log")
+    if path:
+        with open(path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record) + "\n")
+
+
+def pytest_runtest_logstart(nodeid: str, location: Any) -> None:
+    config = _CONFIG.get("config")
+    if config is not None:
+        _log(config, {"nodeid": nodeid, "event": "start"})
+
+
+def pytest_runtest_logreport(report: Any) -> None:
+    config = _CONFIG.get("config")
+    if config is not None:
+        _log(
+            config,
+            {
+                "nodeid": report.nodeid,
+                "event": report.when,
+                "outcome": report.outcome,
+                "duration": report.duration,
+                "timed_out": ("time_limit_exceeded", True) in report.user_properties,
+            },
+        )
+
+
+def pytest_configure(config: Any) -> None:
+    _CONFIG["config"] = config
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item: Any) -> Generator[None, None, None]:
+    limit = item.config.getoption("test_time_limit")
+    if not limit or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def _on_timeout(signum: int, frame: Any) -> None:
+        item.user_properties.append(("time_limit_exceeded", True))
+        raise TestTimeLimitExceeded(f"{item.nodeid} exceeded the per-test time limit of {limit}s")
+
+    previous = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, limit)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
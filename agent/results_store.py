@@ -0,0 +1,569 @@
+"""SQLite-backed results store for evaluation, mutation, sandbox and generation runs.
+
+Every invocation of the scripts opens a *run*; suite metrics, per-test outcomes,
+per-mutant outcomes, per-file/per-line coverage and generation calls are all
+attached to that run. Each ``record_*`` call writes its rows in a single
+transaction so a crash never leaves a half-written suite behind.
+
+Query helpers return iterators over the cursor instead of lists, so trend and
+regression reports stay cheap even when the history grows large.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from .config import RESULTS_DB_PATH
+
+if TYPE_CHECKING:  # pragma: no cover - import cycles only matter for typing
+    from .evaluation import SuiteMetrics
+    from .generator import GenerationResult
+    from .impact import ImpactMap
+    from .mutation import MutationMetrics
+    from .sandbox_runner import SandboxResult
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    label TEXT,
+    started_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS suites (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    name TEXT NOT NULL,
+    test_paths TEXT NOT NULL,
+    runs INTEGER NOT NULL,
+    passes INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    flaky_tests INTEGER NOT NULL,
+    coverage_statement REAL NOT NULL,
+    coverage_branch REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_suites_name_run ON suites(name, run_id);
+
+CREATE TABLE IF NOT EXISTS test_outcomes (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    suite_name TEXT NOT NULL,
+    test_id TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration_seconds REAL NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_test_outcomes_run ON test_outcomes(run_id, suite_name);
+CREATE INDEX IF NOT EXISTS idx_test_outcomes_test ON test_outcomes(suite_name, test_id, run_id);
+
+CREATE TABLE IF NOT EXISTS mutation_runs (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    suite_name TEXT NOT NULL,
+    target_module TEXT NOT NULL,
+    total_mutants INTEGER NOT NULL,
+    killed INTEGER NOT NULL,
+    survived INTEGER NOT NULL,
+    mutation_score REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mutation_runs_suite_run ON mutation_runs(suite_name, run_id);
+
+CREATE TABLE IF NOT EXISTS mutant_outcomes (
+    id INTEGER PRIMARY KEY,
+    mutation_run_id INTEGER NOT NULL REFERENCES mutation_runs(id),
+    mutant_id INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    original TEXT NOT NULL,
+    replacement TEXT NOT NULL,
+    killed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mutant_outcomes_run ON mutant_outcomes(mutation_run_id, mutant_id);
+
+CREATE TABLE IF NOT EXISTS coverage_files (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    suite_name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    num_statements INTEGER NOT NULL,
+    covered_lines INTEGER NOT NULL,
+    num_branches INTEGER NOT NULL,
+    covered_branches INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_coverage_files_run ON coverage_files(run_id, suite_name);
+CREATE INDEX IF NOT EXISTS idx_coverage_files_path ON coverage_files(path, run_id);
+
+CREATE TABLE IF NOT EXISTS coverage_lines (
+    coverage_file_id INTEGER NOT NULL REFERENCES coverage_files(id),
+    line INTEGER NOT NULL,
+    covered INTEGER NOT NULL,
+    PRIMARY KEY (coverage_file_id, line)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS sandbox_runs (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_file TEXT NOT NULL,
+    returncode INTEGER NOT NULL,
+    timed_out INTEGER NOT NULL,
+    duration_seconds REAL NOT NULL,
+    stdout TEXT NOT NULL,
+    stderr TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sandbox_runs_file ON sandbox_runs(test_file, run_id);
+
+CREATE TABLE IF NOT EXISTS generation_calls (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    module_path TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_chars INTEGER NOT NULL,
+    response_chars INTEGER NOT NULL,
+    duration_seconds REAL NOT NULL,
+    violations TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_generation_calls_module ON generation_calls(module_path, run_id);
+
+-- Test impact map: the latest known mapping from each test to the source
+-- lines (and enclosing functions) it covers, plus the file contents it was
+-- taken from. Replaced wholesale on every evaluation of a suite.
+CREATE TABLE IF NOT EXISTS impact_tests (
+    suite_name TEXT NOT NULL,
+    test_id TEXT NOT NULL,
+    test_file TEXT NOT NULL,
+    PRIMARY KEY (suite_name, test_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS impact_lines (
+    suite_name TEXT NOT NULL,
+    test_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    scope TEXT NOT NULL,
+    PRIMARY KEY (suite_name, test_id, path, line)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_impact_lines_path ON impact_lines(suite_name, path, scope);
+
+CREATE TABLE IF NOT EXISTS impact_arcs (
+    suite_name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    from_line INTEGER NOT NULL,
+    to_line INTEGER NOT NULL,
+    PRIMARY KEY (suite_name, path, from_line, to_line)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS impact_files (
+    suite_name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (suite_name, path)
+) WITHOUT ROWID;
+"""
+
+# Column allow-lists for trend/regression queries. The value says whether a
+# *higher* number is better, which decides what counts as a regression.
+SUITE_METRICS = {
+    "passes": True,
+    "failures": False,
+    "flaky_tests": False,
+    "coverage_statement": True,
+    "coverage_branch": True,
+}
+MUTATION_METRICS = {
+    "mutation_score": True,
+    "killed": True,
+    "survived": False,
+    "total_mutants": True,
+}
+
+# ``test_outcomes.suite_name`` used for per-test timings of sandbox runs.
+SANDBOX_SUITE = "sandbox"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class ResultsStore:
+    """Thin wrapper around a SQLite database holding all recorded results."""
+
+    def __init__(self, db_path: str | Path = RESULTS_DB_PATH) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def start_run(self, kind: str, label: Optional[str] = None) -> int:
+        """Open a new run (e.g. ``"evaluation"`` or ``"generation"``) and return its id."""
+        with self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO runs (kind, label, started_at) VALUES (?, ?, ?)",
+                (kind, label, _now()),
+            )
+        return int(cur.lastrowid)
+
+    def record_suite(self, run_id: int, metrics: "SuiteMetrics") -> int:
+        """Store suite metrics, per-test outcomes and per-file/line coverage."""
+        with self._conn:
+            cur = self._conn.execute(
+                """
+                INSERT INTO suites (run_id, name, test_paths, runs, passes, failures,
+                                    flaky_tests, coverage_statement, coverage_branch)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    run_id,
+                    metrics.name,
+                    json.dumps(metrics.test_paths),
+                    metrics.runs,
+                    metrics.passes,
+                    metrics.failures,
+                    metrics.flaky_tests,
+                    metrics.coverage_statement,
+                    metrics.coverage_branch,
+                ),
+            )
+            suite_id = int(cur.lastrowid)
+
+            self._conn.executemany(
+                """
+                INSERT INTO test_outcomes (run_id, suite_name, test_id, outcome,
+                                           duration_seconds, failures)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    (run_id, metrics.name, t.test_id, t.outcome, t.duration_seconds, t.failures)
+                    for t in metrics.test_outcomes
+                ),
+            )
+
+            for fc in metrics.file_coverage:
+                cur = self._conn.execute(
+                    """
+                    INSERT INTO coverage_files (run_id, suite_name, path, num_statements,
+                                                covered_lines, num_branches, covered_branches)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        run_id,
+                        metrics.name,
+                        fc.path,
+                        fc.num_statements,
+                        fc.covered_lines,
+                        fc.num_branches,
+                        fc.covered_branches,
+                    ),
+                )
+                file_id = int(cur.lastrowid)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO coverage_lines (coverage_file_id, line, covered) VALUES (?, ?, ?)",
+                    [(file_id, line, 1) for line in fc.executed_lines]
+                    + [(file_id, line, 0) for line in fc.missing_lines],
+                )
+        return suite_id
+
+    def record_mutation(self, run_id: int, metrics: "MutationMetrics") -> int:
+        """Store a mutation analysis summary together with every mutant's outcome."""
+        with self._conn:
+            cur = self._conn.execute(
+                """
+                INSERT INTO mutation_runs (run_id, suite_name, target_module, total_mutants,
+                                           killed, survived, mutation_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    run_id,
+                    metrics.suite_name,
+                    metrics.target_module,
+                    metrics.total_mutants,
+                    metrics.killed,
+                    metrics.survived,
+                    metrics.mutation_score,
+                ),
+            )
+            mutation_run_id = int(cur.lastrowid)
+            self._conn.executemany(
+                """
+                INSERT INTO mutant_outcomes (mutation_run_id, mutant_id, line, original,
+                                             replacement, killed)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    (mutation_run_id, m.mutant_id, m.line, m.original, m.replacement, int(m.killed))
+                    for m in metrics.mutants
+                ),
+            )
+        return mutation_run_id
+
+    def record_sandbox(self, run_id: int, result: "SandboxResult") -> int:
+        with self._conn:
+            cur = self._conn.execute(
+                """
+                INSERT INTO sandbox_runs (run_id, test_file, returncode, timed_out,
+                                          duration_seconds, stdout, stderr)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    run_id,
+                    result.test_file,
+                    result.returncode,
+                    int(result.timed_out),
+                    result.duration_seconds,
+                    result.stdout,
+                    result.stderr,
+                ),
+            )
+            # Per-test timings, so slow generated tests can be tracked over time.
+            self._conn.executemany(
+                """
+                INSERT INTO test_outcomes (run_id, suite_name, test_id, outcome,
+                                           duration_seconds, failures)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    (run_id, SANDBOX_SUITE, t.test_id, t.outcome, t.duration_seconds, t.failures)
+                    for t in result.test_outcomes
+                ),
+            )
+        return int(cur.lastrowid)
+
+    def record_generation(self, run_id: int, result: "GenerationResult") -> int:
+        with self._conn:
+            cur = self._conn.execute(
+                """
+                INSERT INTO generation_calls (run_id, module_path, output_path, model,
+                                              prompt_chars, response_chars, duration_seconds,
+                                              violations, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    run_id,
+                    str(result.module_path),
+                    str(result.output_path),
+                    result.model,
+                    result.prompt_chars,
+                    result.response_chars,
+                    result.duration_seconds,
+                    json.dumps(result.violations),
+                    _now(),
+                ),
+            )
+        return int(cur.lastrowid)
+
+    def save_impact_map(self, suite_name: str, impact_map: "ImpactMap") -> None:
+        """Replace the stored test impact map of a suite."""
+        from .impact import line_scopes
+
+        with self._conn:
+            for table in ("impact_tests", "impact_lines", "impact_arcs", "impact_files"):
+                self._conn.execute(f"DELETE FROM {table} WHERE suite_name = ?", (suite_name,))
+            self._conn.executemany(
+                "INSERT INTO impact_tests (suite_name, test_id, test_file) VALUES (?, ?, ?)",
+                ((suite_name, test_id, test_file) for test_id, test_file in impact_map.tests.items()),
+            )
+            self._conn.executemany(
+                "INSERT INTO impact_files (suite_name, path, kind, content) VALUES (?, ?, ?, ?)",
+                [(suite_name, path, "source", text) for path, text in impact_map.sources.items()]
+                + [(suite_name, path, "test", text) for path, text in impact_map.test_files.items()],
+            )
+            self._conn.executemany(
+                "INSERT INTO impact_arcs (suite_name, path, from_line, to_line) VALUES (?, ?, ?, ?)",
+                (
+                    (suite_name, path, a, b)
+                    for path, arcs in impact_map.arcs.items()
+                    for a, b in arcs
+                ),
+            )
+            scopes = {path: line_scopes(text) for path, text in impact_map.sources.items()}
+            self._conn.executemany(
+                "INSERT INTO impact_lines (suite_name, test_id, path, line, scope) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (suite_name, test_id, path, line, scopes.get(path, {}).get(line, "<module>"))
+                    for test_id, files in impact_map.lines.items()
+                    for path, lines in files.items()
+                    for line in lines
+                ),
+            )
+
+    def load_impact_map(self, suite_name: str) -> Optional["ImpactMap"]:
+        """Return the stored impact map of a suite, or None if it was never recorded."""
+        from .impact import ImpactMap
+
+        impact_map = ImpactMap()
+        for path, kind, content in self._conn.execute(
+            "SELECT path, kind, content FROM impact_files WHERE suite_name = ?", (suite_name,)
+        ):
+            (impact_map.sources if kind == "source" else impact_map.test_files)[path] = content
+        if not impact_map.sources and not impact_map.test_files:
+            return None
+        for test_id, test_file in self._conn.execute(
+            "SELECT test_id, test_file FROM impact_tests WHERE suite_name = ?", (suite_name,)
+        ):
+            impact_map.tests[test_id] = test_file
+        for test_id, path, line in self._conn.execute(
+            "SELECT test_id, path, line FROM impact_lines WHERE suite_name = ?", (suite_name,)
+        ):
+            impact_map.lines.setdefault(test_id, {}).setdefault(path, set()).add(line)
+        for path, a, b in self._conn.execute(
+            "SELECT path, from_line, to_line FROM impact_arcs WHERE suite_name = ?", (suite_name,)
+        ):
+            impact_map.arcs.setdefault(path, set()).add((a, b))
+        return impact_map
+
+    def latest_suite(self, suite_name: str) -> Optional[Dict[str, Any]]:
+        """Return the most recent ``suites`` row for a suite as a dict (including ``run_id``)."""
+        cur = self._conn.execute(
+            "SELECT * FROM suites WHERE name = ? ORDER BY run_id DESC, id DESC LIMIT 1", (suite_name,)
+        )
+        row = cur.fetchone()
+        if row is None:
+            return None
+        return dict(zip((col[0] for col in cur.description), row))
+
+    def iter_test_outcomes(self, run_id: int, suite_name: str) -> Iterator[Tuple[str, str, float, int]]:
+        """Yield ``(test_id, outcome, duration_seconds, failures)`` recorded for a suite in a run."""
+        yield from self._conn.execute(
+            """
+            SELECT test_id, outcome, duration_seconds, failures FROM test_outcomes
+            WHERE run_id = ? AND suite_name = ?
+            ORDER BY id
+            """,
+            (run_id, suite_name),
+        )
+
+    def iter_coverage_files(
+        self, run_id: int, suite_name: str
+    ) -> Iterator[Tuple[str, int, int, int, int, List[int], List[int]]]:
+        """Yield ``(path, statements, covered, branches, covered_branches, executed, missing)``."""
+        files = self._conn.execute(
+            """
+            SELECT id, path, num_statements, covered_lines, num_branches, covered_branches
+            FROM coverage_files WHERE run_id = ? AND suite_name = ?
+            ORDER BY path
+            """,
+            (run_id, suite_name),
+        ).fetchall()
+        for file_id, path, stmts, covered, branches, covered_branches in files:
+            executed: List[int] = []
+            missing: List[int] = []
+            for line, is_covered in self._conn.execute(
+                "SELECT line, covered FROM coverage_lines WHERE coverage_file_id = ? ORDER BY line", (file_id,)
+            ):
+                (executed if is_covered else missing).append(line)
+            yield path, stmts, covered, branches, covered_branches, executed, missing
+
+    # ------------------------------------------------------------------
+    # Queries (all streaming)
+    # ------------------------------------------------------------------
+
+    def iter_runs(self, limit: Optional[int] = None) -> Iterator[Tuple[int, str, Optional[str], str]]:
+        """Yield ``(run_id, kind, label, started_at)``, newest first."""
+        sql = "SELECT id, kind, label, started_at FROM runs ORDER BY id DESC"
+        params: Tuple[Any, ...] = ()
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = (limit,)
+        yield from self._conn.execute(sql, params)
+
+    def iter_trend(
+        self,
+        suite_name: str,
+        metric: str,
+        limit: Optional[int] = None,
+    ) -> Iterator[Tuple[int, str, float]]:
+        """Yield ``(run_id, started_at, value)`` for a suite or mutation metric, oldest first."""
+        table, name_col = self._metric_source(metric)
+        sql = f"""
+            SELECT run_id, started_at, value FROM (
+                SELECT t.run_id AS run_id, r.started_at AS started_at, t.{metric} AS value
+                FROM {table} t JOIN runs r ON r.id = t.run_id
+                WHERE t.{name_col} = ?
+                ORDER BY t.run_id DESC
+                {"LIMIT ?" if limit is not None else ""}
+            ) ORDER BY run_id
+        """
+        params: Tuple[Any, ...] = (suite_name,) if limit is None else (suite_name, limit)
+        yield from self._conn.execute(sql, params)
+
+    def iter_regressions(
+        self,
+        metric: str,
+        threshold: float = 0.0,
+    ) -> Iterator[Tuple[str, int, float, float]]:
+        """Yield ``(suite_name, run_id, previous, current)`` where a metric got worse.
+
+        Each suite's value is compared with the value from its previous run; a
+        change larger than ``threshold`` in the "worse" direction is reported.
+        """
+        table, name_col = self._metric_source(metric)
+        higher_is_better = {**SUITE_METRICS, **MUTATION_METRICS}[metric]
+        worse = "prev - value" if higher_is_better else "value - prev"
+        sql = f"""
+            SELECT name, run_id, prev, value FROM (
+                SELECT {name_col} AS name, run_id, {metric} AS value,
+                       LAG({metric}) OVER (PARTITION BY {name_col} ORDER BY run_id) AS prev
+                FROM {table}
+            )
+            WHERE prev IS NOT NULL AND {worse} > ?
+            ORDER BY name, run_id
+        """
+        yield from self._conn.execute(sql, (threshold,))
+
+    def iter_test_regressions(self, suite_name: str) -> Iterator[Tuple[str, int, str, str]]:
+        """Yield ``(test_id, run_id, previous_outcome, outcome)`` for tests that stopped passing."""
+        sql = """
+            SELECT test_id, run_id, prev, outcome FROM (
+                SELECT test_id, run_id, outcome,
+                       LAG(outcome) OVER (PARTITION BY test_id ORDER BY run_id) AS prev
+                FROM test_outcomes
+                WHERE suite_name = ?
+            )
+            WHERE prev = 'passed' AND outcome IN ('failed', 'error')
+            ORDER BY run_id, test_id
+        """
+        yield from self._conn.execute(sql, (suite_name,))
+
+    @staticmethod
+    def _metric_source(metric: str) -> Tuple[str, str]:
+        if metric in SUITE_METRICS:
+            return "suites", "name"
+        if metric in MUTATION_METRICS:
+            return "mutation_runs", "suite_name"
+        known = sorted({*SUITE_METRICS, *MUTATION_METRICS})
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {known}")
+
+
+@contextmanager
+def use_store(store: Optional[ResultsStore] = None) -> Iterator[ResultsStore]:
+    """Yield ``store`` if given, otherwise open (and afterwards close) the default one."""
+    if store is not None:
+        yield store
+        return
+    owned = ResultsStore()
+    try:
+        yield owned
+    finally:
+        owned.close()
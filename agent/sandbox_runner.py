@@ -2,13 +2,20 @@
 
 from __future__ import annotations
 
+import ast
 import json
 import os
 import subprocess
 import sys
+import tempfile
 import time
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import PER_TEST_BUDGET_SECONDS, PER_TEST_TIME_LIMIT_SECONDS, SUITE_BUDGET_SECONDS
+from .evaluation import TestOutcome
+from .results_store import ResultsStore, use_store
 
 
 @dataclass
@@ -19,17 +26,169 @@ class SandboxResult:
     stdout: str
     stderr: str
     duration_seconds: float
+    # Per-test timings; outcome "timeout" means the test hit the per-test limit
+    # or was still running when the suite budget ran out.
+    test_outcomes: List[TestOutcome] = field(default_factory=list)
+    slow_tests: List[str] = field(default_factory=list)  # over the per-test budget, slowest first
+    quarantined: List[str] = field(default_factory=list)  # marked skip in the test file
+    per_test_budget: float = PER_TEST_BUDGET_SECONDS
+    suite_budget: float = SUITE_BUDGET_SECONDS
+
+    @property
+    def total_test_seconds(self) -> float:
+        return sum(t.duration_seconds for t in self.test_outcomes)
 
 
 # Project root: folder that contains src/, tests/, data/
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
 
-def run_pytest_sandbox(test_path: str, timeout: int = 30) -> SandboxResult:
+def _read_durations_log(path: Path, elapsed: float) -> List[TestOutcome]:
+    """Turn the ``agent.pytest_budget`` log into one outcome per test.
+
+    A test that started but never finished was killed by the suite timeout; it
+    is charged with whatever part of ``elapsed`` the finished tests do not explain.
+    """
+    durations: Dict[str, float] = {}
+    outcomes: Dict[str, str] = {}
+    finished = set()
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # partially written when the run was killed
+        nodeid = record["nodeid"]
+        durations.setdefault(nodeid, 0.0)
+        event = record["event"]
+        if event == "start":
+            continue
+        durations[nodeid] += record["duration"]
+        if event == "teardown":
+            finished.add(nodeid)
+        if record.get("timed_out"):
+            outcomes[nodeid] = "timeout"
+        elif record["outcome"] == "failed":
+            outcomes.setdefault(nodeid, "failed" if event == "call" else "error")
+        elif record["outcome"] == "skipped":
+            outcomes.setdefault(nodeid, "skipped")
+        elif event == "call":
+            outcomes.setdefault(nodeid, "passed")
+
+    unexplained = max(elapsed - sum(durations.values()), 0.0)
+    result = []
+    for nodeid, duration in durations.items():
+        if nodeid not in finished:
+            outcome, duration = "timeout", duration + unexplained
+        else:
+            outcome = outcomes.get(nodeid, "error")
+        failures = int(outcome in ("failed", "error", "timeout"))  # a single run, as in evaluation rows
+        result.append(TestOutcome(nodeid, outcome, duration, failures=failures))
+    return result
+
+
+def _select_quarantine(
+    outcomes: List[TestOutcome], per_test_budget: float, suite_budget: float
+) -> Tuple[List[str], List[str]]:
+    """Return ``(slow, quarantine)`` test ids.
+
+    Every test over ``per_test_budget`` is slow and quarantined; after that, the
+    slowest remaining tests are quarantined until the rest fits ``suite_budget``.
+    """
+    ranked = sorted(outcomes, key=lambda t: t.duration_seconds, reverse=True)
+    slow = [t.test_id for t in ranked if t.duration_seconds > per_test_budget]
+    quarantine = list(slow)
+    remaining = sum(t.duration_seconds for t in ranked if t.test_id not in quarantine)
+    for t in ranked:
+        if remaining <= suite_budget:
+            break
+        if t.test_id not in quarantine:
+            quarantine.append(t.test_id)
+            remaining -= t.duration_seconds
+    return slow, quarantine
+
+
+def quarantine_tests(test_path: str, test_ids: List[str], reason: str) -> List[str]:
+    """Mark the given tests in ``test_path`` with ``pytest.mark.skip``.
+
+    Parametrized ids quarantine the whole test function. Returns the ids whose
+    function was found (and is now skipped).
+    """
+    path = Path(test_path)
+    source = path.read_text(encoding="utf-8")
+    tree = ast.parse(source)
+
+    def find(body: List[ast.stmt], names: List[str]) -> Optional[ast.AST]:
+        for node in body:
+            if getattr(node, "name", None) != names[0]:
+                continue
+            if len(names) == 1 and isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                return node
+            if len(names) > 1 and isinstance(node, ast.ClassDef):
+                return find(node.body, names[1:])
+        return None
+
+    targets: Dict[int, int] = {}  # first line of the definition -> column
+    found = []
+    for test_id in test_ids:
+        names = test_id.split("[", 1)[0].split("::")[1:]
+        node = find(tree.body, names) if names else None
+        if node is None:
+            continue
+        found.append(test_id)
+        first = min([node.lineno] + [d.lineno for d in node.decorator_list])  # type: ignore[attr-defined]
+        targets[first] = node.col_offset  # type: ignore[attr-defined]
+    if not targets:
+        return []
+
+    lines = source.splitlines(keepends=True)
+    marker = f"@pytest.mark.skip(reason={('quarantined: ' + reason)!r})\n"
+    for first in sorted(targets, reverse=True):
+        lines.insert(first - 1, " " * targets[first] + marker)
+
+    # ``pytest`` must be bound before the first decorated test is defined.
+    has_pytest = any(
+        isinstance(node, ast.Import)
+        and any(alias.name == "pytest" and alias.asname is None for alias in node.names)
+        and node.lineno < min(targets)
+        for node in tree.body
+    )
+    if not has_pytest:
+        # after a docstring / ``from __future__`` imports, which must stay first
+        insert_at = 0
+        for node in tree.body:
+            is_docstring = isinstance(node, ast.Expr) and isinstance(getattr(node, "value", None), ast.Constant)
+            is_future = isinstance(node, ast.ImportFrom) and node.module == "__future__"
+            if not (is_docstring and insert_at == 0 or is_future):
+                break
+            insert_at = node.end_lineno or node.lineno
+        lines.insert(insert_at, "import pytest\n")
+
+    path.write_text("".join(lines), encoding="utf-8")
+    return found
+
+
+def run_pytest_sandbox(
+    test_path: str,
+    timeout: float = SUITE_BUDGET_SECONDS,
+    per_test_budget: float = PER_TEST_BUDGET_SECONDS,
+    per_test_limit: float = PER_TEST_TIME_LIMIT_SECONDS,
+    quarantine: bool = False,
+) -> SandboxResult:
     """Run pytest on a given test file from the project root with a timeout.
 
     This is a light-weight sandbox: it enforces a timeout and captures output,
     but does not isolate the filesystem like a container.
+
+    ``timeout`` is the budget for the whole suite. Every test is timed; tests
+    slower than ``per_test_budget`` are reported in ``slow_tests`` and a test
+    still running after ``per_test_limit`` is interrupted and fails. With
+    ``quarantine=True`` the slow tests, and the slowest others if the suite
+    still does not fit ``timeout``, are marked skipped in the test file so later
+    evaluation and mutation runs do not pay for them again.
     """
     test_path_obj = Path(test_path).resolve()
 
@@ -44,46 +203,81 @@ def run_pytest_sandbox(test_path: str, timeout: int = 30) -> SandboxResult:
     existing = env.get("PYTHONPATH")
     env["PYTHONPATH"] = os.pathsep.join(extra_paths + ([existing] if existing else []))
 
-    cmd = [sys.executable, "-m", "pytest", str(test_path_obj)]
+    with tempfile.TemporaryDirectory() as tmp:
+        durations_log = Path(tmp) / "durations.jsonl"
+        cmd = [
+            sys.executable,
+            "-m",
+            "pytest",
+            str(test_path_obj),
+            "-p",
+            "agent.pytest_budget",
+            f"--test-durations-log={durations_log}",
+            f"--test-time-limit={per_test_limit}",
+        ]
 
-    start = time.time()
-    try:
-        proc = subprocess.run(
-            cmd,
-            cwd=PROJECT_ROOT,
-            env=env,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=timeout,
-        )
-        timed_out = False
-    except subprocess.TimeoutExpired as exc:
-        timed_out = True
-        stdout = exc.stdout or ""
-        stderr = exc.stderr or ""
-        duration = time.time() - start
-        return SandboxResult(
-            test_file=str(test_path_obj),
-            returncode=124,
-            timed_out=True,
-            stdout=stdout,
-            stderr=stderr,
-            duration_seconds=duration,
+        start = time.time()
+        try:
+            proc = subprocess.run(
+                cmd,
+                cwd=PROJECT_ROOT,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                timeout=timeout,
+            )
+            result = SandboxResult(
+                test_file=str(test_path_obj),
+                returncode=proc.returncode,
+                timed_out=False,
+                stdout=proc.stdout,
+                stderr=proc.stderr,
+                duration_seconds=time.time() - start,
+            )
+        except subprocess.TimeoutExpired as exc:
+            stdout = exc.stdout or ""
+            stderr = exc.stderr or ""
+            result = SandboxResult(
+                test_file=str(test_path_obj),
+                returncode=124,
+                timed_out=True,
+                stdout=stdout if isinstance(stdout, str) else stdout.decode(errors="replace"),
+                stderr=stderr if isinstance(stderr, str) else stderr.decode(errors="replace"),
+                duration_seconds=time.time() - start,
+            )
+        result.test_outcomes = _read_durations_log(durations_log, result.duration_seconds)
+
+    result.per_test_budget = per_test_budget
+    result.suite_budget = timeout
+    slow, to_quarantine = _select_quarantine(result.test_outcomes, per_test_budget, timeout)
+    result.slow_tests = slow
+    if quarantine and to_quarantine:
+        result.quarantined = quarantine_tests(
+            str(test_path_obj),
+            to_quarantine,
+            f"exceeded the runtime budget ({per_test_budget}s per test, {timeout}s per suite)",
         )
+    return result
 
-    duration = time.time() - start
-    return SandboxResult(
-        test_file=str(test_path_obj),
-        returncode=proc.returncode,
-        timed_out=timed_out,
-        stdout=proc.stdout,
-        stderr=proc.stderr,
-        duration_seconds=duration,
-    )
 
+def save_sandbox_result(
+    result: SandboxResult,
+    output_dir: Optional[str] = None,
+    run_id: Optional[int] = None,
+    store: Optional[ResultsStore] = None,
+) -> int:
+    """Record a sandbox run in the results store and return the run id used.
+
+    ``output_dir`` optionally also writes ``sandbox_last_run.json`` there.
+    """
+    with use_store(store) as s:
+        if run_id is None:
+            run_id = s.start_run("sandbox")
+        s.record_sandbox(run_id, result)
 
-def save_sandbox_result(result: SandboxResult, output_dir: str = "data/results") -> None:
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-    out_path = Path(output_dir) / "sandbox_last_run.json"
-    out_path.write_text(json.dumps(asdict(result), indent=2), encoding="utf-8")
+    if output_dir is not None:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        out_path = Path(output_dir) / "sandbox_last_run.json"
+        out_path.write_text(json.dumps(asdict(result), indent=2), encoding="utf-8")
+    return run_id
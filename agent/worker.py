@@ -0,0 +1,173 @@
+"""Worker loop that executes mutation / evaluation jobs from a shared queue.
+
+Each worker keeps a private copy of the project (``src/``, ``tests/`` and
+``pyproject.toml``) in a temporary directory and runs every job there, so
+several workers can mutate the same module at the same time without stepping
+on each other or on the shared checkout. The copy is refreshed whenever the
+worker moves on to a new batch.
+
+Start workers by hand on any host that can see the queue file::
+
+    python -m scripts.run_worker --queue data/jobs/queue.db
+
+or use :func:`start_local_workers` for a multi-process stand-in on one machine.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import JOB_LEASE_SECONDS, JOB_QUEUE_PATH
+from .evaluation import run_rerun_job
+from .job_queue import SQLiteJobQueue
+from .mutation import run_mutant_job
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any], Path], Dict[str, Any]]] = {
+    "mutant": run_mutant_job,
+    "rerun": run_rerun_job,
+}
+
+# What a worker copies from the project root into its workspace.
+WORKSPACE_ENTRIES = ("src", "tests", "pyproject.toml")
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{multiprocessing.current_process().pid}"
+
+
+def prepare_workspace(project_root: Path, workspace: Path) -> Path:
+    """(Re)create ``workspace`` as a fresh copy of the parts of the project tests need."""
+    if workspace.exists():
+        shutil.rmtree(workspace)
+    workspace.mkdir(parents=True)
+    ignore = shutil.ignore_patterns("__pycache__", ".pytest_cache", "*.pyc")
+    for entry in WORKSPACE_ENTRIES:
+        src = project_root / entry
+        if src.is_dir():
+            shutil.copytree(src, workspace / entry, ignore=ignore)
+        elif src.is_file():
+            shutil.copy2(src, workspace / entry)
+    return workspace
+
+
+class _LeaseKeeper:
+    """Background thread that renews a job's lease while the job runs."""
+
+    def __init__(self, queue_path: Path, job_id: int, worker_id: str, lease_seconds: float) -> None:
+        self._args = (queue_path, job_id, worker_id, lease_seconds)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        queue_path, job_id, worker_id, lease_seconds = self._args
+        # SQLite connections cannot be shared across threads, so open our own.
+        with SQLiteJobQueue(queue_path) as queue:
+            while not self._stop.wait(lease_seconds / 3):
+                if not queue.renew(job_id, worker_id, lease_seconds):
+                    return
+
+    def __enter__(self) -> "_LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _exit_on_signal(signum: int, frame: Any) -> None:
+    raise SystemExit(128 + signum)
+
+
+def run_worker(
+    queue_path: str | Path = JOB_QUEUE_PATH,
+    worker_id: Optional[str] = None,
+    exit_when_idle: bool = True,
+    poll_interval: float = 1.0,
+    lease_seconds: float = JOB_LEASE_SECONDS,
+) -> int:
+    """Lease and execute jobs until the queue is drained; return how many jobs were completed.
+
+    With ``exit_when_idle=False`` the worker keeps polling forever, which is
+    what long-lived workers on other hosts want.
+    """
+    queue_path = Path(queue_path)
+    worker_id = worker_id or default_worker_id()
+    scratch = Path(tempfile.mkdtemp(prefix="agent-worker-"))
+    workspace = scratch / "project"
+    current_batch: Optional[str] = None
+    completed = 0
+
+    if threading.current_thread() is threading.main_thread():
+        # Turn SIGTERM into SystemExit so the workspace is still cleaned up.
+        signal.signal(signal.SIGTERM, _exit_on_signal)
+
+    try:
+        with SQLiteJobQueue(queue_path) as queue:
+            while True:
+                job = queue.lease(worker_id, lease_seconds)
+                if job is None:
+                    counts = queue.counts()
+                    if exit_when_idle and not counts.get("pending") and not counts.get("leased"):
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                assert job.job_id is not None
+                try:
+                    handler = JOB_HANDLERS[job.kind]
+                    if job.batch != current_batch:
+                        prepare_workspace(Path(job.payload["project_root"]), workspace)
+                        current_batch = job.batch
+                    with _LeaseKeeper(queue_path, job.job_id, worker_id, lease_seconds):
+                        result = handler(job.payload, workspace)
+                except Exception as exc:  # report and let the queue decide about retries
+                    queue.fail(job.job_id, worker_id, f"{type(exc).__name__}: {exc}")
+                    current_batch = None  # rebuild the workspace before the next job
+                    continue
+
+                if queue.complete(job.job_id, worker_id, result):
+                    completed += 1
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    return completed
+
+
+def start_local_workers(count: int, queue_path: str | Path = JOB_QUEUE_PATH) -> List[multiprocessing.Process]:
+    """Start ``count`` long-lived worker processes on this host.
+
+    The caller is responsible for calling :func:`stop_local_workers` once the
+    batches it cares about are finished.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    processes = []
+    for i in range(count):
+        proc = ctx.Process(
+            target=run_worker,
+            kwargs={
+                "queue_path": str(queue_path),
+                "worker_id": f"{socket.gethostname()}-{os.getpid()}-local-{i}",
+                "exit_when_idle": False,
+            },
+            daemon=True,
+        )
+        proc.start()
+        processes.append(proc)
+    return processes
+
+
+def stop_local_workers(processes: List[multiprocessing.Process]) -> None:
+    for proc in processes:
+        proc.terminate()
+    for proc in processes:
+        proc.join()
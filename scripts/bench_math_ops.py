@@ -0,0 +1,138 @@
+"""Benchmark the math_ops kernels against their previous implementations.
+
+    python -m scripts.bench_math_ops --size 1000000 --window 50
+
+The NumPy batch versions are included when numpy is installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import timeit
+from typing import Callable, Dict, Iterable, List, Sequence
+
+from src.utils import math_ops
+
+
+# --- previous implementations, kept here as the reference point ---
+
+def _old_mean(values: Iterable[float]) -> float:
+    vals: List[float] = list(values)
+    if not vals:
+        raise ValueError("values must not be empty")
+    return sum(vals) / len(vals)
+
+
+def _old_weighted_mean(values: Sequence[float], weights: Sequence[float]) -> float:
+    total_weight = sum(weights)
+    return sum(v * w for v, w in zip(values, weights)) / total_weight
+
+
+def _old_dot_product(a: Sequence[float], b: Sequence[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+def _old_moving_average(values: Sequence[float], window_size: int) -> List[float]:
+    result: List[float] = []
+    for i in range(len(values)):
+        start = max(0, i + 1 - window_size)
+        window = values[start : i + 1]
+        result.append(sum(window) / len(window))
+    return result
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare old and new math_ops kernels.")
+    parser.add_argument("--size", type=int, default=200_000, help="Number of points per series.")
+    parser.add_argument("--window", type=int, default=50, help="Moving-average window size.")
+    parser.add_argument("--rows", type=int, default=1_000, help="Rows for the batch kernels.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    values = [rng.uniform(-1, 1) for _ in range(args.size)]
+    weights = [rng.uniform(0, 1) for _ in range(args.size)]
+    row_len = max(args.size // args.rows, 1)
+
+    cases: Dict[str, tuple] = {
+        # Trades some speed for memory: the old version copied the whole input.
+        "mean (iterator, chunked)": (
+            lambda: _old_mean(iter(values)),
+            lambda: math_ops.mean(iter(values)),
+        ),
+        "weighted_mean": (
+            lambda: _old_weighted_mean(values, weights),
+            lambda: math_ops.weighted_mean(values, weights),
+        ),
+        "dot_product": (
+            lambda: _old_dot_product(values, weights),
+            lambda: math_ops.dot_product(values, weights),
+        ),
+        f"moving_average (w={args.window})": (
+            lambda: _old_moving_average(values, args.window),
+            lambda: math_ops.moving_average(values, args.window),
+        ),
+        f"iter_moving_average (w={args.window})": (
+            lambda: _old_moving_average(values, args.window),
+            lambda: sum(1 for _ in math_ops.iter_moving_average(iter(values), args.window)),
+        ),
+    }
+
+    try:
+        import numpy as np
+
+        from src.utils import math_ops_batch
+    except ImportError:
+        print("numpy not installed; skipping batch kernels")
+    else:
+        arr = np.asarray(values)
+        warr = np.asarray(weights)
+        rows_v = [values[i : i + row_len] for i in range(0, row_len * args.rows, row_len)]
+        rows_w = [weights[i : i + row_len] for i in range(0, row_len * args.rows, row_len)]
+        mat_v = np.asarray(rows_v)
+        mat_w = np.asarray(rows_w)
+        coeffs = [(rng.uniform(0.5, 2), rng.uniform(-5, 5), rng.uniform(-5, 5)) for _ in range(args.rows)]
+        ca, cb, cc = (np.asarray(col) for col in zip(*coeffs))
+        cases.update(
+            {
+                f"mean x{args.rows} rows": (
+                    lambda: [math_ops.mean(r) for r in rows_v],
+                    lambda: math_ops_batch.mean_batch(mat_v),
+                ),
+                f"weighted_mean x{args.rows} rows": (
+                    lambda: [math_ops.weighted_mean(v, w) for v, w in zip(rows_v, rows_w)],
+                    lambda: math_ops_batch.weighted_mean_batch(mat_v, mat_w),
+                ),
+                f"dot_product x{args.rows} rows": (
+                    lambda: [math_ops.dot_product(v, w) for v, w in zip(rows_v, rows_w)],
+                    lambda: math_ops_batch.dot_product_batch(mat_v, mat_w),
+                ),
+                f"solve_quadratic x{args.rows}": (
+                    lambda: [math_ops.solve_quadratic(*abc) for abc in coeffs],
+                    lambda: math_ops_batch.solve_quadratic_batch(ca, cb, cc),
+                ),
+                f"moving_average_array (w={args.window})": (
+                    lambda: _old_moving_average(values, args.window),
+                    lambda: math_ops_batch.moving_average_array(arr, args.window),
+                ),
+                "dot_product (whole series)": (
+                    lambda: _old_dot_product(values, weights),
+                    lambda: math_ops_batch.dot_product_batch(arr, warr),
+                ),
+            }
+        )
+
+    print(f"{'kernel':<38} {'old (s)':>10} {'new (s)':>10} {'speed-up':>9}")
+    for name, (old, new) in cases.items():
+        t_old = _time(old, args.repeat)
+        t_new = _time(new, args.repeat)
+        print(f"{name:<38} {t_old:>10.4f} {t_new:>10.4f} {t_old / t_new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Throughput benchmark for the string utilities.
+
+    python -m scripts.bench_strings --lines 1000000 --processes 4
+
+Compares the previous implementations with the current ones, then the
+streaming batch and file APIs, serially and with a process pool.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import deque
+from typing import Callable, Iterable, List
+
+from src.utils import strings, strings_batch
+
+
+# --- previous implementations, kept here as the reference point ---
+
+def _old_normalize_whitespace(s: str) -> str:
+    parts = s.split()
+    return " ".join(parts)
+
+
+def _old_is_palindrome(s: str) -> bool:
+    cleaned = [ch.lower() for ch in s if ch.isalnum()]
+    return cleaned == list(reversed(cleaned))
+
+
+def _make_lines(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    words = ["GET", "POST", "/api/v1/items", "200", "404", "user=42", "took", "12ms", "level", "ERROR", "racecar"]
+    lines = []
+    for i in range(count):
+        line = "  ".join(rng.choice(words) for _ in range(rng.randint(4, 12)))
+        if i % 50 == 0:
+            line = "A man, a plan, a canal: Panama"  # some palindromes scan to the end
+        lines.append(f"2024-01-01T00:00:{i % 60:02d}\t{line}  ")
+    return lines
+
+
+def _consume(results: Iterable[object]) -> None:
+    deque(results, maxlen=0)
+
+
+def _report(name: str, fn: Callable[[], None], count: int, size_mb: float) -> None:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<44} {elapsed:>8.3f}s {count / elapsed / 1e6:>8.2f}M lines/s {size_mb / elapsed:>8.1f} MB/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure string utility throughput.")
+    parser.add_argument("--lines", type=int, default=500_000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=strings_batch.DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    lines = _make_lines(args.lines)
+    size_mb = sum(len(line) + 1 for line in lines) / 1e6
+    n = len(lines)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lines.txt")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.writelines(line + "\n" for line in lines)
+
+        print(f"{n} lines, {size_mb:.1f} MB")
+        _report("is_palindrome (old)", lambda: _consume(map(_old_is_palindrome, lines)), n, size_mb)
+        _report("is_palindrome (two-pointer)", lambda: _consume(map(strings.is_palindrome, lines)), n, size_mb)
+        _report("normalize_whitespace (old)", lambda: _consume(map(_old_normalize_whitespace, lines)), n, size_mb)
+        _report("normalize_whitespace", lambda: _consume(map(strings.normalize_whitespace, lines)), n, size_mb)
+        _report(
+            "is_palindrome_batch",
+            lambda: _consume(strings_batch.is_palindrome_batch(lines, chunk_size=args.chunk_size)),
+            n,
+            size_mb,
+        )
+        _report(
+            "is_palindrome_file",
+            lambda: _consume(strings_batch.is_palindrome_file(path, chunk_size=args.chunk_size)),
+            n,
+            size_mb,
+        )
+        _report(
+            "normalize_whitespace_file",
+            lambda: _consume(strings_batch.normalize_whitespace_file(path, chunk_size=args.chunk_size)),
+            n,
+            size_mb,
+        )
+        if args.processes > 1:
+            _report(
+                f"is_palindrome_file ({args.processes} processes)",
+                lambda: _consume(
+                    strings_batch.is_palindrome_file(path, processes=args.processes, chunk_size=args.chunk_size)
+                ),
+                n,
+                size_mb,
+            )
+            _report(
+                f"normalize_whitespace_file ({args.processes} processes)",
+                lambda: _consume(
+                    strings_batch.normalize_whitespace_file(path, processes=args.processes, chunk_size=args.chunk_size)
+                ),
+                n,
+                size_mb,
+            )
+
+
+if __name__ == "__main__":
+    main()
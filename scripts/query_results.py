@@ -0,0 +1,60 @@
+"""Query trends and regressions from the results store.
+
+Examples:
+    python -m scripts.query_results runs --limit 10
+    python -m scripts.query_results trend generated coverage_statement
+    python -m scripts.query_results regressions mutation_score --threshold 0.05
+    python -m scripts.query_results test-regressions baseline
+
+Rows are printed as they are read from SQLite, so no full history is held in memory.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from agent.config import RESULTS_DB_PATH
+from agent.results_store import MUTATION_METRICS, SUITE_METRICS, ResultsStore
+
+
+def main() -> None:
+    metrics = sorted({*SUITE_METRICS, *MUTATION_METRICS})
+
+    parser = argparse.ArgumentParser(description="Query the evaluation results store.")
+    parser.add_argument("--db", default=RESULTS_DB_PATH, help="Path to the results database.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    runs = sub.add_parser("runs", help="List recorded runs, newest first.")
+    runs.add_argument("--limit", type=int, default=20)
+
+    trend = sub.add_parser("trend", help="Show a metric for one suite over time.")
+    trend.add_argument("suite", help="Suite name, e.g. 'baseline' or 'generated'.")
+    trend.add_argument("metric", choices=metrics)
+    trend.add_argument("--limit", type=int, default=None, help="Only show the most recent N runs.")
+
+    regressions = sub.add_parser("regressions", help="Show runs where a metric got worse.")
+    regressions.add_argument("metric", choices=metrics)
+    regressions.add_argument("--threshold", type=float, default=0.0)
+
+    test_regressions = sub.add_parser("test-regressions", help="Show tests that went from passing to failing.")
+    test_regressions.add_argument("suite")
+
+    args = parser.parse_args()
+
+    with ResultsStore(args.db) as store:
+        if args.command == "runs":
+            for run_id, kind, label, started_at in store.iter_runs(args.limit):
+                print(f"{run_id:>6}  {started_at}  {kind:<12} {label or ''}")
+        elif args.command == "trend":
+            for run_id, started_at, value in store.iter_trend(args.suite, args.metric, args.limit):
+                print(f"{run_id:>6}  {started_at}  {value}")
+        elif args.command == "regressions":
+            for name, run_id, previous, current in store.iter_regressions(args.metric, args.threshold):
+                print(f"{name:<12} run {run_id:>6}: {previous} -> {current}")
+        elif args.command == "test-regressions":
+            for test_id, run_id, previous, current in store.iter_test_regressions(args.suite):
+                print(f"run {run_id:>6}  {test_id}: {previous} -> {current}")
+
+
+if __name__ == "__main__":
+    main()
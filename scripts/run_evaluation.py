@@ -2,28 +2,78 @@
 
 from __future__ import annotations
 
+import argparse
+
+from agent.config import JOB_QUEUE_PATH
 from agent.evaluation import evaluate_suite, save_metrics
+from agent.job_queue import SQLiteJobQueue
 from agent.mutation import compute_mutation_score, DEFAULT_TARGET_MODULE, BASELINE_TESTS, GENERATED_TESTS, save_mutation_metrics
+from agent.results_store import ResultsStore
+from agent.worker import start_local_workers, stop_local_workers
 
 
 def main() -> None:
-    # Baseline suite
-    baseline_metrics = evaluate_suite("baseline", "tests/baseline/test_*_baseline.py")
-    save_metrics(baseline_metrics, "data/results/eval_baseline.json")
+    parser = argparse.ArgumentParser(description="Evaluate baseline and generated test suites.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Start this many local worker processes and run mutants/reruns through the job queue.",
+    )
+    parser.add_argument(
+        "--queue",
+        default=None,
+        help=f"Submit jobs to this shared queue (e.g. {JOB_QUEUE_PATH}) and let external workers run them.",
+    )
+    parser.add_argument(
+        "--affected-only",
+        action="store_true",
+        help="Only rerun tests affected by source/test changes since the last evaluation; carry the rest forward.",
+    )
+    args = parser.parse_args()
+
+    queue = None
+    workers = []
+    if args.workers or args.queue:
+        queue = SQLiteJobQueue(args.queue or JOB_QUEUE_PATH)
+        workers = start_local_workers(args.workers, queue.db_path)
+
+    try:
+        with ResultsStore() as store:
+            run_id = store.start_run("evaluation")
+
+            # Baseline suite
+            baseline_metrics = evaluate_suite(
+                "baseline",
+                "tests/baseline/test_*_baseline.py",
+                queue=queue,
+                store=store,
+                affected_only=args.affected_only,
+            )
+            save_metrics(baseline_metrics, run_id=run_id, store=store)
 
-    baseline_mut = compute_mutation_score("baseline", DEFAULT_TARGET_MODULE, BASELINE_TESTS)
-    save_mutation_metrics(baseline_mut, "data/results/mutation_baseline.json")
+            baseline_mut = compute_mutation_score("baseline", DEFAULT_TARGET_MODULE, BASELINE_TESTS, queue=queue)
+            save_mutation_metrics(baseline_mut, run_id=run_id, store=store)
 
-    # Generated suite
-    generated_metrics = evaluate_suite("generated", "tests/generated/test_*_generated.py")
-    save_metrics(generated_metrics, "data/results/eval_generated.json")
+            # Generated suite
+            generated_metrics = evaluate_suite(
+                "generated",
+                "tests/generated/test_*_generated.py",
+                queue=queue,
+                store=store,
+                affected_only=args.affected_only,
+            )
+            save_metrics(generated_metrics, run_id=run_id, store=store)
 
-    generated_mut = compute_mutation_score("generated", DEFAULT_TARGET_MODULE, GENERATED_TESTS)
-    save_mutation_metrics(generated_mut, "data/results/mutation_generated.json")
+            generated_mut = compute_mutation_score("generated", DEFAULT_TARGET_MODULE, GENERATED_TESTS, queue=queue)
+            save_mutation_metrics(generated_mut, run_id=run_id, store=store)
+    finally:
+        stop_local_workers(workers)
+        if queue is not None:
+            queue.close()
 
-    print("Saved baseline metrics to data/results/eval_baseline.json")
-    print("Saved generated metrics to data/results/eval_generated.json")
-    print("Saved mutation metrics to data/results/mutation_*.json")
+    print(f"Saved evaluation run {run_id} to {store.db_path}")
+    print("Inspect it with: python -m scripts.query_results runs")
 
 if __name__ == "__main__":
     main()
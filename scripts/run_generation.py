@@ -5,28 +5,118 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
+from agent.config import PER_TEST_BUDGET_SECONDS, SUITE_BUDGET_SECONDS
 from agent.generator import generate_tests_for_module
+from agent.iterative import generate_tests_iteratively
+from agent.results_store import ResultsStore
 from agent.sandbox_runner import run_pytest_sandbox, save_sandbox_result
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Generate tests for a Python module using Gemini.")
     parser.add_argument("module_path", help="Path to the Python module, e.g. src/utils/math_ops.py")
+    parser.add_argument(
+        "--iterative",
+        action="store_true",
+        help="Refine the generated tests in feedback rounds targeting uncovered lines and surviving mutants.",
+    )
+    parser.add_argument("--coverage-target", type=float, default=0.9, help="Statement coverage to reach (iterative mode).")
+    parser.add_argument(
+        "--mutation-target",
+        type=float,
+        default=0.8,
+        help="Mutation score to reach (iterative mode); a negative value skips mutation analysis.",
+    )
+    parser.add_argument("--max-rounds", type=int, default=5)
+    parser.add_argument("--token-budget", type=int, default=None, help="Stop once this many model tokens were spent.")
+    parser.add_argument("--time-budget", type=float, default=None, help="Stop after this many seconds.")
+    parser.add_argument(
+        "--test-budget",
+        type=float,
+        default=PER_TEST_BUDGET_SECONDS,
+        help="Seconds a single generated test may take before it is flagged as slow.",
+    )
+    parser.add_argument(
+        "--suite-budget",
+        type=float,
+        default=SUITE_BUDGET_SECONDS,
+        help="Seconds the whole generated suite may take in the sandbox.",
+    )
+    parser.add_argument(
+        "--no-quarantine",
+        action="store_true",
+        help="Only report tests over budget instead of marking them skipped in the generated file.",
+    )
     args = parser.parse_args()
 
-    result = generate_tests_for_module(args.module_path)
-    print(f"Generated tests at: {result.output_path}")
-    if result.violations:
-        print(f"WARNING: Forbidden imports detected in generated code: {result.violations}")
-    print(f"Used dummy generator: {result.used_dummy}")
+    if args.iterative:
+        iterative = generate_tests_iteratively(
+            args.module_path,
+            coverage_target=args.coverage_target,
+            mutation_target=args.mutation_target if args.mutation_target >= 0 else None,
+            max_rounds=args.max_rounds,
+            token_budget=args.token_budget,
+            time_budget=args.time_budget,
+        )
+        output_path = iterative.output_path
+        calls = iterative.calls
+        violations = iterative.violations
+        for r in iterative.rounds:
+            mutation = f"{r.mutation_score:.2%}" if r.mutation_score is not None else "n/a"
+            print(
+                f"Round {r.round}: coverage {r.coverage_statement:.2%} (branch {r.coverage_branch:.2%}), "
+                f"mutation {mutation}, targeted {r.targeted_functions or '-'}, "
+                f"+{r.added_tests}/-{r.dropped_tests} tests, {r.model_calls} call(s), "
+                f"{r.cache_hits} cache hit(s), {r.tokens} tokens, {r.seconds:.1f}s"
+            )
+        if iterative.quarantined_tests:
+            print(f"Skipped {len(iterative.quarantined_tests)} starting test(s) that fail on the unmodified module")
+        print(f"Stopped: {iterative.stop_reason} ({iterative.model_calls} model call(s), {iterative.tokens_used} tokens)")
+    else:
+        result = generate_tests_for_module(args.module_path)
+        output_path = result.output_path
+        calls = [result]
+        violations = result.violations
+        print(f"Used dummy generator: {result.used_dummy}")
+
+    print(f"Generated tests at: {output_path}")
+    if violations:
+        print(f"WARNING: Forbidden imports detected in generated code: {violations}")
 
     # Run sandboxed pytest on the generated tests.
-    sandbox_result = run_pytest_sandbox(str(result.output_path))
-    save_sandbox_result(sandbox_result)
+    sandbox_result = run_pytest_sandbox(
+        str(output_path),
+        timeout=args.suite_budget,
+        per_test_budget=args.test_budget,
+        quarantine=not args.no_quarantine,
+    )
+
+    with ResultsStore() as store:
+        run_id = store.start_run("generation", label=args.module_path)
+        for call in calls:
+            store.record_generation(run_id, call)
+        save_sandbox_result(sandbox_result, run_id=run_id, store=store)
 
     print(f"Sandbox return code: {sandbox_result.returncode}")
     if sandbox_result.timed_out:
         print("Sandbox execution timed out.")
+    print(
+        f"Test time: {sandbox_result.total_test_seconds:.2f}s over {len(sandbox_result.test_outcomes)} test(s) "
+        f"(suite budget {sandbox_result.suite_budget:g}s, per-test budget {sandbox_result.per_test_budget:g}s)"
+    )
+    slowest = sorted(sandbox_result.test_outcomes, key=lambda t: t.duration_seconds, reverse=True)[:5]
+    for t in slowest:
+        flags = []
+        if t.test_id in sandbox_result.slow_tests:
+            flags.append("over budget")
+        if t.test_id in sandbox_result.quarantined:
+            flags.append("quarantined")
+        suffix = f"  [{', '.join(flags)}]" if flags else ""
+        print(f"  {t.duration_seconds:8.3f}s  {t.outcome:<8} {t.test_id}{suffix}")
+    if sandbox_result.slow_tests:
+        print(f"Slow tests: {len(sandbox_result.slow_tests)}")
+    if sandbox_result.quarantined:
+        print(f"Quarantined (marked skip in {output_path}): {len(sandbox_result.quarantined)}")
 
 
 if __name__ == "__main__":
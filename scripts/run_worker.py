@@ -0,0 +1,35 @@
+"""CLI entry point for a mutation / evaluation worker.
+
+Run one or more of these on any host that can see the queue file, e.g.:
+
+    python -m scripts.run_worker --queue /shared/agent/queue.db --keep-running
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from agent.config import JOB_LEASE_SECONDS, JOB_QUEUE_PATH
+from agent.worker import default_worker_id, run_worker
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Execute jobs from the shared mutation/evaluation queue.")
+    parser.add_argument("--queue", default=JOB_QUEUE_PATH, help="Path to the SQLite job queue.")
+    parser.add_argument("--worker-id", default=None, help="Unique worker name (default: <host>-<pid>).")
+    parser.add_argument("--keep-running", action="store_true", help="Keep polling instead of exiting when the queue is empty.")
+    parser.add_argument("--lease-seconds", type=float, default=JOB_LEASE_SECONDS)
+    args = parser.parse_args()
+
+    worker_id = args.worker_id or default_worker_id()
+    completed = run_worker(
+        queue_path=args.queue,
+        worker_id=worker_id,
+        exit_when_idle=not args.keep_running,
+        lease_seconds=args.lease_seconds,
+    )
+    print(f"Worker {worker_id} completed {completed} job(s)")
+
+
+if __name__ == "__main__":
+    main()
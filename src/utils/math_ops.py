@@ -12,7 +12,13 @@ so that an AI test generator has to handle:
 
 from __future__ import annotations
 
-from typing import Iterable, Sequence, List, Tuple
+import operator
+from collections import deque
+from itertools import islice
+from typing import Deque, Iterable, Iterator, Sequence, List, Sized, Tuple
+
+# Items summed at a time when mean() consumes an iterator.
+_MEAN_CHUNK_SIZE = 4096
 
 
 def add(a: float, b: float) -> float:
@@ -30,13 +36,31 @@ def divide_safe(a: float, b: float) -> float:
 def mean(values: Iterable[float]) -> float:
     """Return the arithmetic mean of a non-empty iterable of numbers.
 
+    Sequences are summed in place and other iterables are consumed in fixed-size
+    chunks, so the input is never copied as a whole. For an iterator that
+    bounds memory at some cost in speed: it can run up to 20% slower than copying
+    the input to a list first, which is still the fastest way to sum in
+    CPython (counting items one by one while summing is slower still).
+
     Raises:
         ValueError: if values is empty.
     """
-    vals: List[float] = list(values)
-    if not vals:
+    if isinstance(values, Sized):
+        if len(values) == 0:
+            raise ValueError("values must not be empty")
+        return sum(values) / len(values)
+    iterator = iter(values)
+    total: float = 0
+    count = 0
+    while True:
+        chunk = list(islice(iterator, _MEAN_CHUNK_SIZE))
+        if not chunk:
+            break
+        total += sum(chunk)
+        count += len(chunk)
+    if count == 0:
         raise ValueError("values must not be empty")
-    return sum(vals) / len(vals)
+    return total / count
 
 
 def clamp(value: float, lower: float, upper: float) -> float:
@@ -71,7 +95,7 @@ def weighted_mean(values: Sequence[float], weights: Sequence[float]) -> float:
     total_weight = sum(weights)
     if total_weight == 0:
         raise ValueError("total weight must not be zero")
-    return sum(v * w for v, w in zip(values, weights)) / total_weight
+    return sum(map(operator.mul, values, weights)) / total_weight
 
 
 def moving_average(values: Sequence[float], window_size: int) -> List[float]:
@@ -82,6 +106,12 @@ def moving_average(values: Sequence[float], window_size: int) -> List[float]:
     are not enough previous elements to fill the window, it uses a smaller
     window.
 
+    Runs in O(len(values)) whatever the window size. The window sum is kept as
+    a compensated (Neumaier) running sum, so a value that left the window
+    does not take the precision of later windows with it (e.g. a 1e20 spike
+    followed by ones still averages the ones to 1.0). Infinities and NaNs are
+    kept out of that sum and only affect the windows that contain them.
+
     Example:
         values = [1, 2, 3, 4], window_size = 2
         -> [1.0, 1.5, 2.5, 3.5]
@@ -94,14 +124,100 @@ def moving_average(values: Sequence[float], window_size: int) -> List[float]:
     if not values:
         raise ValueError("values must not be empty")
 
+    # Running sum: add the value entering the window, drop the one leaving it.
+    # Neumaier summation, inlined because this loop runs once per element:
+    # ``compensation`` collects the low-order bits ``total`` loses. Non-finite
+    # values would turn both accumulators into inf/nan for good, so they are
+    # tracked by index instead and added back only while inside the window.
     result: List[float] = []
-    for i in range(len(values)):
-        start = max(0, i + 1 - window_size)
-        window = values[start : i + 1]
-        result.append(sum(window) / len(window))
+    total: float = 0
+    compensation: float = 0
+    non_finite: Deque[int] = deque()
+    for i, value in enumerate(values):
+        if value - value == 0:  # finite; also true for ints of any size
+            new_total = total + value
+            if abs(total) >= abs(value):
+                compensation += (total - new_total) + value
+            else:
+                compensation += (value - new_total) + total
+            total = new_total
+        else:
+            non_finite.append(i)
+        if i >= window_size:
+            if non_finite and non_finite[0] == i - window_size:
+                non_finite.popleft()
+            else:
+                leaving = -values[i - window_size]
+                new_total = total + leaving
+                if abs(total) >= abs(leaving):
+                    compensation += (total - new_total) + leaving
+                else:
+                    compensation += (leaving - new_total) + total
+                total = new_total
+            count = window_size
+        else:
+            count = i + 1
+        if non_finite:
+            result.append((total + compensation + sum(values[j] for j in non_finite)) / count)
+        else:
+            result.append((total + compensation) / count)
     return result
 
 
+def iter_moving_average(values: Iterable[float], window_size: int) -> Iterator[float]:
+    """Lazily compute the moving average of a stream of numbers.
+
+    Yields the same values as :func:`moving_average`, one per input, while
+    holding only the current window in memory, so it works on iterators and
+    inputs too large for a list.
+
+    Raises:
+        ValueError: if window_size <= 0 (immediately) or values turns out to be
+            empty (once the stream is exhausted).
+    """
+    if window_size <= 0:
+        raise ValueError("window_size must be positive")
+    return _iter_moving_average(values, window_size)
+
+
+def _iter_moving_average(values: Iterable[float], window_size: int) -> Iterator[float]:
+    # Same compensated running sum as moving_average, inlined for speed, with
+    # the non-finite values of the window kept aside in ``non_finite``.
+    window: Deque[float] = deque()
+    non_finite: Deque[float] = deque()
+    total: float = 0
+    compensation: float = 0
+    for value in values:
+        window.append(value)
+        if value - value == 0:
+            new_total = total + value
+            if abs(total) >= abs(value):
+                compensation += (total - new_total) + value
+            else:
+                compensation += (value - new_total) + total
+            total = new_total
+        else:
+            non_finite.append(value)
+        if len(window) > window_size:
+            leaving = window.popleft()
+            if leaving - leaving == 0:
+                leaving = -leaving
+                new_total = total + leaving
+                if abs(total) >= abs(leaving):
+                    compensation += (total - new_total) + leaving
+                else:
+                    compensation += (leaving - new_total) + total
+                total = new_total
+            else:
+                non_finite.popleft()
+        if non_finite:
+            yield (total + compensation + sum(non_finite)) / len(window)
+        else:
+            yield (total + compensation) / len(window)
+    if not window:
+        raise ValueError("values must not be empty")
+
+
 def factorial(n: int) -> int:
     """Return n! for a non-negative integer n.
 
@@ -124,7 +240,7 @@ def dot_product(a: Sequence[float], b: Sequence[float]) -> float:
     """
     if len(a) != len(b):
         raise ValueError("vectors must have the same length")
-    return sum(x * y for x, y in zip(a, b))
+    return sum(map(operator.mul, a, b))
 
 
 def solve_quadratic(a: float, b: float, c: float) -> Tuple[complex, complex]:
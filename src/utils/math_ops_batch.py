@@ -0,0 +1,136 @@
+"""NumPy-backed batch versions of the numeric kernels in :mod:`math_ops`.
+
+Each function applies its ``math_ops`` counterpart to a whole array of inputs
+at once (one row per input for the sequence kernels) and raises the same
+``ValueError`` as the scalar version would for any of the rows. Requires
+``numpy`` (``pip install .[numpy]``).
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+
+def _rows(values: ArrayLike) -> NDArray[np.float64]:
+    """Return ``values`` as a 2D float array of shape (inputs, elements)."""
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 1:
+        arr = arr[np.newaxis, :]
+    if arr.ndim != 2:
+        raise ValueError("values must be a 1D or 2D array")
+    return arr
+
+
+def mean_batch(values: ArrayLike) -> NDArray[np.float64]:
+    """Return the mean of every row of ``values``.
+
+    Raises:
+        ValueError: if the rows are empty.
+    """
+    arr = _rows(values)
+    if arr.shape[1] == 0:
+        raise ValueError("values must not be empty")
+    return arr.mean(axis=1)
+
+
+def weighted_mean_batch(values: ArrayLike, weights: ArrayLike) -> NDArray[np.float64]:
+    """Return the weighted mean of every row of ``values``.
+
+    ``weights`` has the same shape as ``values``, or is a single row of
+    weights shared by all rows.
+
+    Raises:
+        ValueError: if the shapes do not match, the rows are empty, or the
+            weights of any row sum to zero.
+    """
+    vals = _rows(values)
+    w = _rows(weights)
+    if w.shape[1] != vals.shape[1] or w.shape[0] not in (1, vals.shape[0]):
+        raise ValueError("values and weights must have the same length")
+    if vals.shape[1] == 0:
+        raise ValueError("values must not be empty")
+    total_weight = w.sum(axis=1)
+    if np.any(total_weight == 0):
+        raise ValueError("total weight must not be zero")
+    return np.einsum("ij,ij->i", vals, np.broadcast_to(w, vals.shape)) / total_weight
+
+
+def dot_product_batch(a: ArrayLike, b: ArrayLike) -> NDArray[np.float64]:
+    """Return the dot product of every pair of rows of ``a`` and ``b``.
+
+    Raises:
+        ValueError: if the shapes differ.
+    """
+    x = _rows(a)
+    y = _rows(b)
+    if x.shape != y.shape:
+        raise ValueError("vectors must have the same length")
+    return np.einsum("ij,ij->i", x, y)
+
+
+def moving_average_array(values: ArrayLike, window_size: int) -> NDArray[np.float64]:
+    """Vectorised :func:`math_ops.moving_average` for a 1D array.
+
+    The array is cut into blocks of ``window_size``. A full window then
+    consists of the tail of one block plus the head of the next, so each
+    window sum is a suffix sum plus a prefix sum of the values inside it.
+    Nothing is ever subtracted, so a large spike that left the window cannot
+    cancel away the precision of later windows, unlike a global prefix sum.
+
+    Raises:
+        ValueError: if window_size <= 0 or values is empty.
+    """
+    if window_size <= 0:
+        raise ValueError("window_size must be positive")
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim != 1:
+        raise ValueError("values must be a 1D array")
+    n = arr.size
+    if n == 0:
+        raise ValueError("values must not be empty")
+
+    w = min(window_size, n)
+    blocks = np.zeros(-(-n // w) * w)
+    blocks[:n] = arr
+    blocks = blocks.reshape(-1, w)
+    prefix = np.cumsum(blocks, axis=1).ravel()  # from the block start up to i
+    suffix = np.cumsum(blocks[:, ::-1], axis=1)[:, ::-1].ravel()  # from i to the block end
+
+    sums = prefix[:n].copy()  # windows that start at a block boundary
+    end = np.arange(w, n)
+    start = end - w + 1
+    straddling = start % w != 0
+    sums[end[straddling]] = suffix[start[straddling]] + prefix[end[straddling]]
+    counts = np.minimum(np.arange(1, n + 1), w)
+    return sums / counts
+
+
+def solve_quadratic_batch(
+    a: ArrayLike, b: ArrayLike, c: ArrayLike
+) -> Tuple[NDArray[np.complex128], NDArray[np.complex128]]:
+    """Solve ``a*x^2 + b*x + c = 0`` for every (broadcast) set of coefficients.
+
+    Returns:
+        Two complex arrays ``(r1, r2)`` with the same roots, in the same order,
+        as :func:`math_ops.solve_quadratic`.
+
+    Raises:
+        ValueError: if any ``a`` is zero (not a quadratic).
+    """
+    a_arr, b_arr, c_arr = np.broadcast_arrays(
+        np.asarray(a, dtype=np.float64),
+        np.asarray(b, dtype=np.float64),
+        np.asarray(c, dtype=np.float64),
+    )
+    if np.any(a_arr == 0):
+        raise ValueError("a must not be zero for a quadratic equation")
+
+    discriminant = b_arr ** 2 - 4 * a_arr * c_arr
+    # Take the complex square root so negative discriminants give complex roots.
+    sqrt_disc = np.sqrt(discriminant.astype(np.complex128))
+    r1 = (-b_arr + sqrt_disc) / (2 * a_arr)
+    r2 = (-b_arr - sqrt_disc) / (2 * a_arr)
+    return (r1, r2)
@@ -8,6 +8,23 @@ def normalize_whitespace(s: str) -> str:
     return " ".join(parts)
 
 def is_palindrome(s: str) -> bool:
-    """Return True if s is a palindrome ignoring case and non-alphanumeric characters."""
-    cleaned = [ch.lower() for ch in s if ch.isalnum()]
-    return cleaned == list(reversed(cleaned))
+    """Return True if s is a palindrome ignoring case and non-alphanumeric characters.
+
+    Walks inwards from both ends, skipping non-alphanumeric characters, so no
+    cleaned copy of the string is built and a mismatch stops the scan early.
+    """
+    i, j = 0, len(s) - 1
+    while i < j:
+        left = s[i]
+        if not left.isalnum():
+            i += 1
+            continue
+        right = s[j]
+        if not right.isalnum():
+            j -= 1
+            continue
+        if left != right and left.lower() != right.lower():
+            return False
+        i += 1
+        j -= 1
+    return True
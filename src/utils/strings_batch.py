@@ -0,0 +1,123 @@
+"""Streaming batch versions of the string utilities in :mod:`strings`.
+
+The ``*_batch`` functions take any iterable of strings and the ``*_file``
+functions a text file, one input per line. Results are yielded in input order
+while the input is read lazily, so memory use does not grow with the input.
+
+With ``processes`` > 1 the work is spread over a process pool: inputs are sent
+to the workers in chunks of ``chunk_size`` lines and only a few chunks per
+worker are in flight at a time, which keeps memory bounded for multi-GB inputs
+as well.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, TypeVar, Union
+
+from .strings import is_palindrome, normalize_whitespace
+
+T = TypeVar("T")
+
+DEFAULT_CHUNK_SIZE = 10_000
+# Chunks submitted per worker before waiting for the oldest result.
+_CHUNKS_IN_FLIGHT_PER_PROCESS = 2
+
+
+def _normalize_chunk(lines: List[str]) -> List[str]:
+    return [normalize_whitespace(line) for line in lines]
+
+
+def _palindrome_chunk(lines: List[str]) -> List[bool]:
+    return [is_palindrome(line) for line in lines]
+
+
+def _chunks(items: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _map_chunks(
+    func: Callable[[List[str]], List[T]],
+    items: Iterable[str],
+    processes: Optional[int],
+    chunk_size: int,
+) -> Iterator[T]:
+    # Checked here rather than in the generator so bad arguments fail at the call.
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    return _iter_mapped_chunks(func, items, processes, chunk_size)
+
+
+def _iter_mapped_chunks(
+    func: Callable[[List[str]], List[T]],
+    items: Iterable[str],
+    processes: Optional[int],
+    chunk_size: int,
+) -> Iterator[T]:
+    if not processes or processes <= 1:
+        for chunk in _chunks(items, chunk_size):
+            yield from func(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending: Deque[Future] = deque()
+        for chunk in _chunks(items, chunk_size):
+            pending.append(pool.submit(func, chunk))
+            if len(pending) >= processes * _CHUNKS_IN_FLIGHT_PER_PROCESS:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _read_lines(path: Union[str, Path], encoding: str) -> Iterator[str]:
+    # Split on "\n" only: universal newlines would also break lines at a stray
+    # "\r". The "\r" of a CRLF ending is stripped below.
+    with open(path, "r", encoding=encoding, newline="\n") as fh:
+        for line in fh:
+            yield line.rstrip("\r\n")
+
+
+def normalize_whitespace_batch(
+    lines: Iterable[str],
+    processes: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """Yield :func:`strings.normalize_whitespace` of every string in ``lines``."""
+    return _map_chunks(_normalize_chunk, lines, processes, chunk_size)
+
+
+def is_palindrome_batch(
+    lines: Iterable[str],
+    processes: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bool]:
+    """Yield :func:`strings.is_palindrome` of every string in ``lines``."""
+    return _map_chunks(_palindrome_chunk, lines, processes, chunk_size)
+
+
+def normalize_whitespace_file(
+    path: Union[str, Path],
+    processes: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encoding: str = "utf-8",
+) -> Iterator[str]:
+    """Yield every line of the file at ``path`` with its whitespace normalized."""
+    return normalize_whitespace_batch(_read_lines(path, encoding), processes, chunk_size)
+
+
+def is_palindrome_file(
+    path: Union[str, Path],
+    processes: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encoding: str = "utf-8",
+) -> Iterator[bool]:
+    """Yield whether each line of the file at ``path`` is a palindrome (line ending excluded)."""
+    return is_palindrome_batch(_read_lines(path, encoding), processes, chunk_size)
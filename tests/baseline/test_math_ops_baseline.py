@@ -20,3 +20,48 @@ def test_mean_basic():
 def test_mean_raises_on_empty():
     with pytest.raises(ValueError):
         math_ops.mean([])
+
+def test_moving_average_example():
+    assert math_ops.moving_average([1, 2, 3, 4], 2) == [1.0, 1.5, 2.5, 3.5]
+
+def test_moving_average_matches_window_sums():
+    values = [3, -1, 4, 1, -5, 9, 2, 6]
+    for window_size in range(1, 10):
+        expected = [
+            sum(values[max(0, i + 1 - window_size) : i + 1]) / len(values[max(0, i + 1 - window_size) : i + 1])
+            for i in range(len(values))
+        ]
+        assert math_ops.moving_average(values, window_size) == pytest.approx(expected)
+
+def test_iter_moving_average_streams_same_values():
+    assert list(math_ops.iter_moving_average(iter([1, 2, 3, 4]), 2)) == [1.0, 1.5, 2.5, 3.5]
+
+def test_iter_moving_average_raises():
+    with pytest.raises(ValueError):
+        math_ops.iter_moving_average([1], 0)
+    with pytest.raises(ValueError):
+        list(math_ops.iter_moving_average(iter([]), 3))
+
+def test_mean_of_iterator():
+    assert math_ops.mean(x for x in [1, 2, 3, 4]) == 2.5
+    with pytest.raises(ValueError):
+        math_ops.mean(iter([]))
+
+def test_moving_average_survives_large_spike():
+    # A running sum without compensation returns [1e20, 0.0, 0.0] here.
+    assert math_ops.moving_average([1e20, 1.0, 1.0], 1) == [1e20, 1.0, 1.0]
+    assert list(math_ops.iter_moving_average(iter([1e20, 1.0, 1.0]), 1)) == [1e20, 1.0, 1.0]
+    assert math_ops.moving_average([1.0, 1e20, 3.0, 5.0, 7.0], 2)[3:] == [4.0, 6.0]
+
+def test_moving_average_recovers_after_non_finite():
+    inf = float("inf")
+    assert math_ops.moving_average([1.0, inf, 1.0, 1.0, 1.0], 2) == [1.0, inf, inf, 1.0, 1.0]
+    assert list(math_ops.iter_moving_average(iter([1.0, inf, 1.0, 1.0, 1.0]), 2)) == [1.0, inf, inf, 1.0, 1.0]
+    nan_result = math_ops.moving_average([1.0, float("nan"), 1.0, 1.0, 1.0], 2)
+    assert [x != x for x in nan_result] == [False, True, True, False, False]
+    assert nan_result[3:] == [1.0, 1.0]
+    streamed = list(math_ops.iter_moving_average(iter([1.0, float("nan"), 1.0, 1.0, 1.0]), 2))
+    assert [x != x for x in streamed] == [False, True, True, False, False]
+    assert streamed[3:] == [1.0, 1.0]
+    mixed = math_ops.moving_average([inf, -inf, 1.0, 2.0], 2)
+    assert mixed[0] == inf and mixed[1] != mixed[1] and mixed[2:] == [-inf, 1.5]
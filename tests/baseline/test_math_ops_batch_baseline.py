@@ -0,0 +1,56 @@
+import pytest
+from src.utils import math_ops
+
+np = pytest.importorskip("numpy")
+from src.utils import math_ops_batch  # noqa: E402
+
+def test_mean_batch_matches_scalar():
+    rows = [[1, 2, 3], [4, 5, 9]]
+    assert math_ops_batch.mean_batch(rows).tolist() == [math_ops.mean(r) for r in rows]
+
+def test_mean_batch_raises_on_empty():
+    with pytest.raises(ValueError):
+        math_ops_batch.mean_batch(np.empty((3, 0)))
+
+def test_weighted_mean_batch_matches_scalar():
+    values = [[1, 2, 3], [4, 5, 6]]
+    weights = [[1, 0, 1], [0.5, 0.25, 0.25]]
+    expected = [math_ops.weighted_mean(v, w) for v, w in zip(values, weights)]
+    assert math_ops_batch.weighted_mean_batch(values, weights) == pytest.approx(expected)
+
+def test_weighted_mean_batch_raises():
+    with pytest.raises(ValueError):
+        math_ops_batch.weighted_mean_batch([[1, 2]], [[1, 2, 3]])
+    with pytest.raises(ValueError):
+        math_ops_batch.weighted_mean_batch([[1, 2], [3, 4]], [[1, 1], [0, 0]])
+
+def test_dot_product_batch():
+    assert math_ops_batch.dot_product_batch([[1, 2], [3, 4]], [[5, 6], [7, 8]]).tolist() == [17, 53]
+    with pytest.raises(ValueError):
+        math_ops_batch.dot_product_batch([[1, 2]], [[1, 2, 3]])
+
+def test_moving_average_array_matches_scalar():
+    values = [3, -1, 4, 1, -5, 9, 2, 6]
+    assert math_ops_batch.moving_average_array(values, 3) == pytest.approx(math_ops.moving_average(values, 3))
+    with pytest.raises(ValueError):
+        math_ops_batch.moving_average_array([], 3)
+
+def test_solve_quadratic_batch_matches_scalar():
+    a, b, c = [1, 1, 2], [-3, 2, 0], [2, 5, -8]
+    r1, r2 = math_ops_batch.solve_quadratic_batch(a, b, c)
+    for i in range(3):
+        assert (r1[i], r2[i]) == pytest.approx(math_ops.solve_quadratic(a[i], b[i], c[i]))
+    with pytest.raises(ValueError):
+        math_ops_batch.solve_quadratic_batch([1, 0], 1, 1)
+
+def test_moving_average_array_survives_large_spike():
+    assert math_ops_batch.moving_average_array([1e20, 1.0, 1.0], 1).tolist() == [1e20, 1.0, 1.0]
+    values = [1.0, 1e20] + [2.0] * 10
+    assert math_ops_batch.moving_average_array(values, 3)[4:].tolist() == [2.0] * 8
+
+def test_moving_average_array_recovers_after_non_finite():
+    inf = float("inf")
+    assert math_ops_batch.moving_average_array([1.0, inf, 1.0, 1.0, 1.0], 2).tolist() == [1.0, inf, inf, 1.0, 1.0]
+    result = math_ops_batch.moving_average_array([1.0, float("nan"), 1.0, 1.0, 1.0], 2)
+    assert np.isnan(result).tolist() == [False, True, True, False, False]
+    assert result[3:].tolist() == [1.0, 1.0]
@@ -0,0 +1,91 @@
+import pytest
+from src.utils import strings, strings_batch
+
+
+# Previous implementations, kept as the reference the optimized versions must match.
+def _reference_normalize_whitespace(s):
+    parts = s.split()
+    return " ".join(parts)
+
+def _reference_is_palindrome(s):
+    cleaned = [ch.lower() for ch in s if ch.isalnum()]
+    return cleaned == list(reversed(cleaned))
+
+
+SAMPLES = [
+    "",
+    " ",
+    "a",
+    "ab",
+    "aa",
+    "racecar",
+    "A man, a plan, a canal: Panama",
+    "No 'x' in Nixon",
+    "Was it a car or a cat I saw?",
+    "not a palindrome",
+    "!!!",
+    "a!",
+    "!a",
+    "ab!a",
+    "12321",
+    "12 3 21x",
+    "  leading and   trailing\t\n",
+    "tabs\tand\nnewlines\r\n",
+    "Été",
+    "éTÉ",
+    "İi̇",  # lower() of the dotted capital I is two code points
+    "ßSS",
+    "　wide　space　",
+    "١٢١",  # Arabic-Indic digits
+]
+
+
+@pytest.mark.parametrize("s", SAMPLES)
+def test_is_palindrome_matches_reference(s):
+    assert strings.is_palindrome(s) == _reference_is_palindrome(s)
+
+@pytest.mark.parametrize("s", SAMPLES)
+def test_normalize_whitespace_matches_reference(s):
+    assert strings.normalize_whitespace(s) == _reference_normalize_whitespace(s)
+
+def test_is_palindrome_matches_reference_on_random_strings():
+    import random
+
+    rng = random.Random(0)
+    alphabet = "aAbB1 ,.!éÉ"
+    for _ in range(2000):
+        half = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))
+        for s in (half, half + half[::-1], half + rng.choice(alphabet) + half[::-1].swapcase()):
+            assert strings.is_palindrome(s) == _reference_is_palindrome(s), s
+
+def test_batch_matches_scalar():
+    lines = iter(SAMPLES * 3)
+    assert list(strings_batch.is_palindrome_batch(lines, chunk_size=4)) == [
+        _reference_is_palindrome(s) for s in SAMPLES * 3
+    ]
+    assert list(strings_batch.normalize_whitespace_batch(SAMPLES, chunk_size=5)) == [
+        _reference_normalize_whitespace(s) for s in SAMPLES
+    ]
+
+def test_batch_with_process_pool_keeps_order():
+    lines = [f"  line {i}\t{'x' * (i % 3)}  " for i in range(500)]
+    assert list(strings_batch.normalize_whitespace_batch(lines, processes=2, chunk_size=7)) == [
+        _reference_normalize_whitespace(s) for s in lines
+    ]
+
+def test_file_apis(tmp_path):
+    path = tmp_path / "lines.txt"
+    lines = ["Was it a car or a cat I saw?", "  hello   world ", "", "abc"]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    assert list(strings_batch.is_palindrome_file(path)) == [True, False, True, False]
+    assert list(strings_batch.normalize_whitespace_file(path, processes=2, chunk_size=1)) == [
+        "Was it a car or a cat I saw?", "hello world", "", "abc"
+    ]
+    # CRLF endings are stripped, a lone "\r" inside a line does not split it
+    path.write_bytes(b"ab\rba\r\nx \r y\r\n")
+    assert list(strings_batch.is_palindrome_file(path)) == [True, False]
+    assert list(strings_batch.normalize_whitespace_file(path)) == ["ab ba", "x y"]
+
+def test_batch_rejects_bad_chunk_size():
+    with pytest.raises(ValueError):
+        strings_batch.is_palindrome_batch(["a"], chunk_size=0)
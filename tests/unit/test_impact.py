@@ -0,0 +1,180 @@
+from agent.evaluation import _junit_test_id
+from agent.impact import (
+    IMPORT_CONTEXT,
+    build_impact_map,
+    covered_lines,
+    select_affected_tests,
+    source_files,
+    update_impact_map,
+)
+
+SOURCE = """\
+import math
+
+
+def double(x):
+    return x * 2
+
+
+def root(x):
+    return math.sqrt(x)
+"""
+
+TESTS = """\
+from mod import double, root
+
+
+def test_double():
+    assert double(2) == 4
+
+
+def test_root():
+    assert root(4) == 2
+"""
+
+# Lines executed by each test (coverage contexts are "<module>.<test>").
+COVERAGE = {
+    "files": {
+        "mod.py": {
+            "contexts": {
+                "1": [""],
+                "4": [""],
+                "8": [""],
+                "5": ["test_mod.test_double"],
+                "9": ["test_mod.test_root"],
+            },
+            "executed_branches": [],
+        }
+    }
+}
+TEST_IDS = ["test_mod.py::test_double", "test_mod.py::test_root"]
+
+
+def _project(tmp_path, source=SOURCE, tests=TESTS):
+    (tmp_path / "mod.py").write_text(source, encoding="utf-8")
+    (tmp_path / "test_mod.py").write_text(tests, encoding="utf-8")
+
+
+def _map(tmp_path):
+    _project(tmp_path)
+    return build_impact_map(COVERAGE, TEST_IDS, ["test_mod.py"], root=tmp_path)
+
+
+def test_build_impact_map(tmp_path):
+    impact_map = _map(tmp_path)
+    assert impact_map.tests == {"test_mod.py::test_double": "test_mod.py", "test_mod.py::test_root": "test_mod.py"}
+    assert impact_map.lines["test_mod.py::test_double"] == {"mod.py": {5}}
+    assert impact_map.lines[IMPORT_CONTEXT] == {"mod.py": {1, 4, 8}}
+    assert covered_lines(impact_map, "mod.py") == {1, 4, 5, 8, 9}
+
+
+def test_nothing_changed_selects_nothing(tmp_path):
+    selection = select_affected_tests(_map(tmp_path), ["test_mod.py"], root=tmp_path)
+    assert selection.is_empty
+
+
+def test_function_edit_reruns_only_its_tests(tmp_path):
+    impact_map = _map(tmp_path)
+    (tmp_path / "mod.py").write_text(SOURCE.replace("math.sqrt(x)", "x ** 0.5"), encoding="utf-8")
+    selection = select_affected_tests(impact_map, ["test_mod.py"], root=tmp_path)
+    assert selection.rerun_tests == ["test_mod.py::test_root"]
+    assert selection.rerun_files == [] and selection.removed_tests == set()
+    assert selection.changed_sources == {"mod.py"}
+
+
+def test_moving_a_function_is_not_a_change_to_it(tmp_path):
+    impact_map = _map(tmp_path)
+    moved = SOURCE.replace("import math\n", "import math\n\n\ndef unused():\n    pass\n")
+    (tmp_path / "mod.py").write_text(moved, encoding="utf-8")
+    selection = select_affected_tests(impact_map, ["test_mod.py"], root=tmp_path)
+    assert selection.rerun_tests == []
+    assert selection.line_maps["mod.py"][5] == 9  # `return x * 2` shifted down four lines
+
+
+def test_module_level_edit_reruns_every_test_of_the_module(tmp_path):
+    impact_map = _map(tmp_path)
+    (tmp_path / "mod.py").write_text("import math\nSCALE = 2\n" + SOURCE[len("import math\n") :], encoding="utf-8")
+    selection = select_affected_tests(impact_map, ["test_mod.py"], root=tmp_path)
+    assert selection.rerun_tests == ["test_mod.py::test_double", "test_mod.py::test_root"]
+
+
+def test_deleted_source_reruns_its_tests(tmp_path):
+    impact_map = _map(tmp_path)
+    (tmp_path / "mod.py").unlink()
+    selection = select_affected_tests(impact_map, ["test_mod.py"], root=tmp_path)
+    assert selection.rerun_tests == ["test_mod.py::test_double", "test_mod.py::test_root"]
+
+
+def test_new_source_file_counts_as_changed(tmp_path):
+    impact_map = _map(tmp_path)
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__init__.py").write_text("", encoding="utf-8")
+    (tmp_path / "pkg" / "newmod.py").write_text("X = 1\n", encoding="utf-8")
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "notes" / "scratch.py").write_text("", encoding="utf-8")
+    sources = source_files(["."], root=tmp_path)
+    assert sources == ["mod.py", "pkg/__init__.py", "pkg/newmod.py", "test_mod.py"]
+
+    selection = select_affected_tests(impact_map, ["test_mod.py"], root=tmp_path, source_paths=sources[:3])
+    assert selection.changed_sources == {"pkg/__init__.py", "pkg/newmod.py"}
+    assert selection.rerun_tests == []
+    assert not selection.is_empty
+
+
+def test_edited_test_file_is_rerun_whole_and_deleted_file_drops_its_tests(tmp_path):
+    impact_map = _map(tmp_path)
+    (tmp_path / "test_mod.py").write_text(TESTS + "\n\ndef test_more():\n    pass\n", encoding="utf-8")
+    selection = select_affected_tests(impact_map, ["test_mod.py"], root=tmp_path)
+    assert selection.rerun_files == ["test_mod.py"]
+    assert selection.removed_tests == set(impact_map.tests)
+
+    selection = select_affected_tests(impact_map, [], root=tmp_path)
+    assert selection.rerun_files == []
+    assert selection.removed_tests == set(impact_map.tests)
+
+
+def test_update_impact_map_shifts_carried_lines_and_merges_fresh_results(tmp_path):
+    impact_map = _map(tmp_path)
+    edited = SOURCE.replace("import math\n", "import math\n\n\ndef unused():\n    pass\n").replace(
+        "math.sqrt(x)", "x ** 0.5"
+    )
+    (tmp_path / "mod.py").write_text(edited, encoding="utf-8")
+    selection = select_affected_tests(impact_map, ["test_mod.py"], root=tmp_path)
+    assert selection.rerun_tests == ["test_mod.py::test_root"]
+
+    fresh_coverage = {
+        "files": {
+            "mod.py": {
+                "contexts": {"1": [""], "4": [""], "8": [""], "12": [""], "13": ["test_mod.test_root"]},
+                "executed_branches": [],
+            }
+        }
+    }
+    fresh = build_impact_map(fresh_coverage, ["test_mod.py::test_root"], ["test_mod.py"], root=tmp_path)
+    updated = update_impact_map(impact_map, selection, fresh)
+
+    assert updated.lines["test_mod.py::test_double"] == {"mod.py": {9}}  # 5 -> 9
+    assert updated.lines["test_mod.py::test_root"] == {"mod.py": {13}}
+    assert covered_lines(updated, "mod.py") == {1, 4, 8, 9, 12, 13}
+    assert updated.sources["mod.py"] == edited
+
+
+def test_update_impact_map_drops_removed_tests_and_their_import_lines(tmp_path):
+    impact_map = _map(tmp_path)
+    (tmp_path / "test_mod.py").unlink()
+    selection = select_affected_tests(impact_map, [], root=tmp_path)
+    updated = update_impact_map(impact_map, selection, build_impact_map({"files": {}}, [], [], root=tmp_path))
+    assert updated.tests == {}
+    # no remaining test imports mod.py, so its import-time lines are no longer covered
+    assert covered_lines(updated, "mod.py") == set()
+
+
+def test_junit_test_id_maps_back_to_node_ids(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    paths = ["tests/baseline/test_a.py", "tests/generated/test_b.py"]
+    assert _junit_test_id("tests.baseline.test_a", "test_x", paths) == "tests/baseline/test_a.py::test_x"
+    assert _junit_test_id("tests.generated.test_b.TestK", "test_y[1-2]", paths) == (
+        "tests/generated/test_b.py::TestK::test_y[1-2]"
+    )
+    # collection errors are reported without a class name and match no file
+    assert _junit_test_id("", "tests.baseline.test_a", paths) == "::tests.baseline.test_a"
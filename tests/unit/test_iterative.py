@@ -0,0 +1,127 @@
+import textwrap
+
+import pytest
+
+pytest.importorskip("google.generativeai")  # agent.generator imports the Gemini SDK
+
+from agent import iterative  # noqa: E402
+
+
+MODULE = """\
+def add(a, b):
+    return a + b
+
+
+def sub(a, b):
+    return a - b
+"""
+
+STARTING_TESTS = """\
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mod import add, sub
+
+
+def test_add():
+    assert add(1, 2) == 3
+
+
+def test_wrong():
+    assert sub(1, 1) == 5
+"""
+
+# One passing and one failing test, inside a class.
+TARGETED_RESPONSE = """\
+class TestSub:
+    def test_ok(self):
+        assert sub(3, 1) == 2
+
+    def test_bad(self):
+        assert sub(1, 1) == 9
+"""
+
+
+def test_failing_starting_tests_do_not_kill_mutants(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "mod.py").write_text(MODULE, encoding="utf-8")
+    (tmp_path / "tests").mkdir()
+    test_file = tmp_path / "tests" / "test_mod_generated.py"
+    test_file.write_text(STARTING_TESTS, encoding="utf-8")
+    prompts = []
+
+    def fake_model(prompt):
+        prompts.append(prompt)
+        return TARGETED_RESPONSE, 10, False
+
+    monkeypatch.setattr(iterative, "call_model_cached", fake_model)
+
+    result = iterative.generate_tests_iteratively(
+        "mod.py", output_dir="tests", coverage_target=0.0, mutation_target=0.9, max_rounds=3
+    )
+
+    assert result.quarantined_tests == ["tests/test_mod_generated.py::test_wrong"]
+    # Only the `+` mutant is killed while test_wrong is skipped.
+    assert result.rounds[0].mutation_score == 0.5
+    assert result.rounds[0].targeted_functions == ["sub"]
+    assert len(prompts) == 1
+    # The failing class method is dropped on its own; the rest of the round is kept.
+    assert (result.rounds[0].added_tests, result.rounds[0].dropped_tests) == (2, 1)
+    assert result.rounds[1].mutation_score == 1.0
+    assert result.stop_reason == "targets met"
+    code = test_file.read_text(encoding="utf-8")
+    assert "def test_ok" in code and "def test_bad" not in code
+    assert "@pytest.mark.skip(reason='quarantined: fails on the unmodified module')" in code
+
+
+def test_uncollectable_starting_file_stops_before_any_round(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "mod.py").write_text(MODULE, encoding="utf-8")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_mod_generated.py").write_text("import missing_module\n", encoding="utf-8")
+    monkeypatch.setattr(iterative, "call_model_cached", pytest.fail)
+
+    result = iterative.generate_tests_iteratively("mod.py", output_dir="tests", mutation_target=0.9)
+
+    assert result.rounds == []
+    assert result.stop_reason == "the starting test file could not be collected"
+
+
+def test_test_names_include_class_methods():
+    code = textwrap.dedent(
+        """
+        def test_a(): pass
+        def helper(): pass
+        class TestX:
+            def test_b(self): pass
+            def helper(self): pass
+        class Other:
+            def test_c(self): pass
+        """
+    )
+    assert iterative._test_names(code) == ["test_a", "TestX::test_b"]
+
+
+def test_rename_duplicates_renames_functions_and_classes():
+    taken = {"test_a", "TestX::test_b"}
+    code = "def test_a():\n    pass\nclass TestX:\n    def test_b(self):\n        pass\n"
+    renamed = iterative._rename_duplicates(code, taken, round_no=2)
+    assert "def test_a_r2():" in renamed
+    assert "class TestX_r2:" in renamed
+    assert taken == {"test_a", "TestX::test_b", "test_a_r2", "TestX_r2::test_b"}
+
+
+def test_remove_tests_handles_class_methods(tmp_path):
+    path = tmp_path / "test_file.py"
+    path.write_text(
+        "class TestX:\n    def test_a(self):\n        pass\n\n    def test_b(self):\n        pass\n\n"
+        "class TestY:\n    def test_c(self):\n        pass\n\n"
+        "def test_d():\n    pass\n",
+        encoding="utf-8",
+    )
+    iterative._remove_tests(path, {"TestX::test_a", "TestY::test_c"})
+    code = path.read_text(encoding="utf-8")
+    assert iterative._test_names(code) == ["TestX::test_b", "test_d"]
+    assert "class TestY" not in code  # emptied classes go too, or the file would not parse
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from agent.job_queue import Job, SQLiteJobQueue, failed_jobs
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = SQLiteJobQueue(tmp_path / "queue.db", max_attempts=2)
+    yield q
+    q.close()
+
+
+def _submit(queue, count=1, batch="b"):
+    queue.submit(batch, [Job(kind="rerun", payload={"n": i}) for i in range(count)])
+
+
+def test_lease_complete_and_results(queue):
+    _submit(queue, 2)
+    first = queue.lease("w1")
+    second = queue.lease("w2")
+    assert (first.payload, second.payload) == ({"n": 0}, {"n": 1})
+    assert queue.lease("w3") is None
+    assert queue.complete(first.job_id, "w1", {"ok": 1})
+    assert queue.counts("b") == {"done": 1, "leased": 1}
+    assert queue.complete(second.job_id, "w2", {"ok": 2})
+    results = queue.wait("b", poll_interval=0.01)
+    assert [r.result for r in results] == [{"ok": 1}, {"ok": 2}]
+    assert failed_jobs(results) == []
+
+
+def test_expired_lease_is_retried_and_stale_worker_cannot_finish(queue):
+    _submit(queue)
+    job = queue.lease("dead", lease_seconds=0.01)
+    time.sleep(0.02)
+    retry = queue.lease("alive")
+    assert retry.job_id == job.job_id and retry.attempts == 2
+    assert not queue.renew(job.job_id, "dead")
+    assert not queue.complete(job.job_id, "dead", {"stale": True})
+    assert not queue.fail(job.job_id, "dead", "boom")
+    assert queue.complete(job.job_id, "alive", {"fresh": True})
+    assert [r.result for r in queue.results("b")] == [{"fresh": True}]
+
+
+def test_renewed_lease_is_not_taken_over(queue):
+    _submit(queue)
+    job = queue.lease("w1", lease_seconds=0.05)
+    assert queue.renew(job.job_id, "w1", lease_seconds=60)
+    time.sleep(0.06)
+    assert queue.lease("w2") is None
+
+
+def test_fail_retries_until_max_attempts(queue):
+    _submit(queue)
+    job = queue.lease("w1")
+    assert queue.fail(job.job_id, "w1", "first")
+    assert queue.counts("b") == {"pending": 1}
+    job = queue.lease("w1")
+    assert queue.fail(job.job_id, "w1", "second")
+    results = queue.wait("b", poll_interval=0.01)
+    assert [(j.job_id, error) for j, error in failed_jobs(results)] == [(job.job_id, "second")]
+
+
+def test_wait_fails_job_whose_last_lease_expired_without_any_lease_call(queue):
+    _submit(queue)
+    for worker in ("w1", "w2"):
+        queue.lease(worker, lease_seconds=0.01)
+        time.sleep(0.02)
+    # Every worker is gone: nobody calls lease() again, yet the batch must finish.
+    results = queue.wait("b", poll_interval=0.01, timeout=5)
+    assert [error for _, error in failed_jobs(results)] == ["lease expired"]
+
+
+def test_wait_gives_up_when_no_worker_touches_the_batch(queue):
+    _submit(queue)
+    with pytest.raises(TimeoutError, match="are any workers running"):
+        queue.wait("b", poll_interval=0.01, stall_timeout=0.05)
+
+
+def test_wait_keeps_waiting_while_workers_are_busy_with_another_batch(queue, tmp_path):
+    _submit(queue, batch="long")
+    _submit(queue, batch="queued")
+
+    def worker():
+        # A second connection, like a worker process sharing the queue file.
+        with SQLiteJobQueue(tmp_path / "queue.db") as q:
+            job = q.lease("w1")
+            for _ in range(20):  # busy for several stall timeouts
+                time.sleep(0.02)
+                q.renew(job.job_id, "w1")
+            q.complete(job.job_id, "w1", {"batch": "long"})
+            job = q.lease("w1")
+            q.complete(job.job_id, "w1", {"batch": "queued"})
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    try:
+        results = queue.wait("queued", poll_interval=0.01, timeout=5, stall_timeout=0.1)
+    finally:
+        thread.join()
+    assert [r.result for r in results] == [{"batch": "queued"}]
+
+
+def test_wait_timeout(queue):
+    _submit(queue)
+    queue.lease("w1", lease_seconds=60)
+    with pytest.raises(TimeoutError, match="did not finish"):
+        queue.wait("b", poll_interval=0.01, timeout=0.05, stall_timeout=None)
@@ -0,0 +1,19 @@
+from agent.prompt_templates import build_targeted_test_prompt
+
+
+def test_targeted_prompt_keeps_multiline_blocks_intact():
+    source = "def clamp(value, lower, upper):\n    if lower > upper:\n        raise ValueError\n    return value"
+    prompt = build_targeted_test_prompt(
+        module_name="math_ops",
+        func_name="clamp",
+        func_source=source,
+        uncovered=["line 2: if lower > upper:", "line 3: raise ValueError"],
+        surviving_mutants=["line 2: `>` replaced by `>=`"],
+        existing_tests=["test_clamp"],
+    )
+    lines = prompt.splitlines()
+    assert source in prompt
+    assert "- line 2: if lower > upper:\n- line 3: raise ValueError" in prompt
+    assert lines[0] == "You are an expert Python testing assistant."
+    assert "Module: math_ops" in lines
+    assert "(existing tests: test_clamp)" in prompt
@@ -0,0 +1,159 @@
+import pytest
+
+from agent.evaluation import FileCoverage, SuiteMetrics
+from agent.evaluation import TestOutcome as Outcome  # aliased so pytest does not collect it
+from agent.impact import IMPORT_CONTEXT, ImpactMap
+from agent.mutation import MutantOutcome, MutationMetrics
+from agent.results_store import SANDBOX_SUITE, ResultsStore
+from agent.sandbox_runner import SandboxResult
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = ResultsStore(tmp_path / "results.db")
+    yield s
+    s.close()
+
+
+def _suite(name="s", failures=0, coverage=0.9, outcomes=None):
+    return SuiteMetrics(
+        name=name,
+        test_paths=["tests/test_mod.py"],
+        runs=3,
+        passes=3 - failures,
+        failures=failures,
+        flaky_tests=0,
+        coverage_statement=coverage,
+        coverage_branch=0.5,
+        test_outcomes=outcomes or [],
+        file_coverage=[],
+    )
+
+
+def _record(store, metrics):
+    run_id = store.start_run("evaluation")
+    store.record_suite(run_id, metrics)
+    return run_id
+
+
+def test_record_suite_round_trip(store):
+    metrics = _suite(
+        failures=1,
+        outcomes=[
+            Outcome("tests/test_mod.py::test_a", "passed", 0.25),
+            Outcome("tests/test_mod.py::test_b", "failed", 0.5, failures=2),
+        ],
+    )
+    metrics.file_coverage = [FileCoverage("src/mod.py", 4, 3, 2, 1, [1, 2, 4], [3])]
+    run_id = _record(store, metrics)
+
+    row = store.latest_suite("s")
+    assert row["run_id"] == run_id
+    assert (row["runs"], row["passes"], row["failures"], row["coverage_statement"]) == (3, 2, 1, 0.9)
+    assert list(store.iter_test_outcomes(run_id, "s")) == [
+        ("tests/test_mod.py::test_a", "passed", 0.25, 0),
+        ("tests/test_mod.py::test_b", "failed", 0.5, 2),
+    ]
+    assert list(store.iter_coverage_files(run_id, "s")) == [("src/mod.py", 4, 3, 2, 1, [1, 2, 4], [3])]
+    assert store.latest_suite("other") is None
+
+
+def test_record_mutation_round_trip(store):
+    run_id = store.start_run("mutation")
+    metrics = MutationMetrics(
+        suite_name="s",
+        target_module="src/mod.py",
+        total_mutants=2,
+        killed=1,
+        survived=1,
+        mutation_score=0.5,
+        mutants=[MutantOutcome(10, 2, "+", "-", True), MutantOutcome(30, 4, "<", ">", False)],
+    )
+    mutation_run_id = store.record_mutation(run_id, metrics)
+
+    assert [value for _, _, value in store.iter_trend("s", "mutation_score")] == [0.5]
+    assert store._conn.execute(
+        "SELECT mutant_id, line, original, replacement, killed FROM mutant_outcomes"
+        " WHERE mutation_run_id = ? ORDER BY mutant_id",
+        (mutation_run_id,),
+    ).fetchall() == [(10, 2, "+", "-", 1), (30, 4, "<", ">", 0)]
+
+
+def test_record_sandbox_round_trip(store):
+    run_id = store.start_run("sandbox")
+    result = SandboxResult(
+        test_file="tests/generated/test_mod.py",
+        returncode=1,
+        timed_out=False,
+        stdout="out",
+        stderr="err",
+        duration_seconds=1.5,
+        test_outcomes=[Outcome("tests/generated/test_mod.py::test_slow", "timeout", 10.0, failures=1)],
+    )
+    store.record_sandbox(run_id, result)
+
+    assert store._conn.execute(
+        "SELECT test_file, returncode, timed_out, duration_seconds, stdout, stderr FROM sandbox_runs"
+    ).fetchall() == [("tests/generated/test_mod.py", 1, 0, 1.5, "out", "err")]
+    assert list(store.iter_test_outcomes(run_id, SANDBOX_SUITE)) == [
+        ("tests/generated/test_mod.py::test_slow", "timeout", 10.0, 1)
+    ]
+
+
+def test_iter_trend_is_oldest_first_and_limit_keeps_the_newest(store):
+    runs = [_record(store, _suite(coverage=c)) for c in (0.5, 0.6, 0.7)]
+    _record(store, _suite(name="other", coverage=0.1))
+
+    assert [(r, v) for r, _, v in store.iter_trend("s", "coverage_statement")] == list(zip(runs, [0.5, 0.6, 0.7]))
+    assert [(r, v) for r, _, v in store.iter_trend("s", "coverage_statement", limit=2)] == list(
+        zip(runs[1:], [0.6, 0.7])
+    )
+    with pytest.raises(ValueError, match="Unknown metric"):
+        list(store.iter_trend("s", "name"))
+
+
+def test_iter_regressions_respects_metric_direction(store):
+    _record(store, _suite(failures=0, coverage=0.9))
+    second = _record(store, _suite(failures=2, coverage=0.8))
+    _record(store, _suite(failures=1, coverage=0.95))
+
+    assert list(store.iter_regressions("failures")) == [("s", second, 0, 2)]
+    assert list(store.iter_regressions("coverage_statement")) == [("s", second, 0.9, 0.8)]
+    assert list(store.iter_regressions("coverage_statement", threshold=0.2)) == []
+
+
+def test_iter_test_regressions(store):
+    def outcomes(a, b):
+        return [Outcome("t::a", a, 0.1), Outcome("t::b", b, 0.1)]
+
+    _record(store, _suite(outcomes=outcomes("passed", "failed")))
+    second = _record(store, _suite(outcomes=outcomes("error", "failed")))
+    _record(store, _suite(outcomes=outcomes("passed", "passed")))
+    fourth = _record(store, _suite(outcomes=outcomes("passed", "failed")))
+
+    assert list(store.iter_test_regressions("s")) == [
+        ("t::a", second, "passed", "error"),
+        ("t::b", fourth, "passed", "failed"),
+    ]
+    assert list(store.iter_test_regressions("other")) == []
+
+
+def test_save_and_load_impact_map(store):
+    impact_map = ImpactMap(
+        tests={"tests/test_mod.py::test_a": "tests/test_mod.py"},
+        lines={
+            "tests/test_mod.py::test_a": {"src/mod.py": {2, 3}},
+            IMPORT_CONTEXT: {"src/mod.py": {1}},
+        },
+        sources={"src/mod.py": "def f():\n    x = 1\n    return x\n"},
+        test_files={"tests/test_mod.py": "def test_a():\n    pass\n"},
+        arcs={"src/mod.py": {(2, 3), (3, -1)}},
+    )
+    assert store.load_impact_map("s") is None
+    store.save_impact_map("s", impact_map)
+    assert store.load_impact_map("s") == impact_map
+
+    # Saving again replaces the previous map instead of merging into it.
+    smaller = ImpactMap(sources={"src/mod.py": "X = 1\n"})
+    store.save_impact_map("s", smaller)
+    assert store.load_impact_map("s") == smaller
@@ -0,0 +1,110 @@
+import json
+import signal
+
+import pytest
+
+from agent.evaluation import TestOutcome as Outcome  # aliased so pytest does not collect it
+from agent.sandbox_runner import _read_durations_log, _select_quarantine, quarantine_tests, run_pytest_sandbox
+
+
+def _write_log(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+
+
+def _phases(nodeid, call_outcome, setup_outcome="passed", duration=0.1, timed_out=False):
+    return [
+        {"nodeid": nodeid, "event": "start"},
+        {"nodeid": nodeid, "event": "setup", "outcome": setup_outcome, "duration": 0.0},
+        {"nodeid": nodeid, "event": "call", "outcome": call_outcome, "duration": duration, "timed_out": timed_out},
+        {"nodeid": nodeid, "event": "teardown", "outcome": "passed", "duration": 0.0},
+    ]
+
+
+def test_failures_count_every_outcome_that_did_not_pass(tmp_path):
+    log = tmp_path / "durations.jsonl"
+    _write_log(
+        log,
+        _phases("t.py::test_ok", "passed")
+        + _phases("t.py::test_bad", "failed")
+        + _phases("t.py::test_limit", "failed", duration=2.0, timed_out=True)
+        + _phases("t.py::test_skip", "skipped")
+        + [{"nodeid": "t.py::test_hang", "event": "start"}],
+    )
+    outcomes = {t.test_id: (t.outcome, t.failures) for t in _read_durations_log(log, elapsed=5.0)}
+    assert outcomes == {
+        "t.py::test_ok": ("passed", 0),
+        "t.py::test_bad": ("failed", 1),
+        "t.py::test_limit": ("timeout", 1),
+        "t.py::test_skip": ("skipped", 0),
+        "t.py::test_hang": ("timeout", 1),
+    }
+
+
+def test_unfinished_test_is_charged_with_the_unexplained_time(tmp_path):
+    log = tmp_path / "durations.jsonl"
+    _write_log(log, _phases("t.py::test_ok", "passed", duration=1.0) + [{"nodeid": "t.py::test_hang", "event": "start"}])
+    durations = {t.test_id: t.duration_seconds for t in _read_durations_log(log, elapsed=30.0)}
+    assert durations == {"t.py::test_ok": 1.0, "t.py::test_hang": 29.0}
+
+
+def test_select_quarantine_takes_slow_tests_then_the_slowest_until_the_suite_fits():
+    outcomes = [
+        Outcome("t.py::test_a", "passed", 0.5),
+        Outcome("t.py::test_slow", "passed", 3.0),
+        Outcome("t.py::test_b", "passed", 0.9),
+        Outcome("t.py::test_c", "passed", 0.8),
+        Outcome("t.py::test_d", "passed", 0.1),
+    ]
+    slow, quarantine = _select_quarantine(outcomes, per_test_budget=1.0, suite_budget=1.0)
+    assert slow == ["t.py::test_slow"]
+    assert quarantine == ["t.py::test_slow", "t.py::test_b", "t.py::test_c"]
+
+    assert _select_quarantine(outcomes, per_test_budget=5.0, suite_budget=10.0) == ([], [])
+
+
+def test_quarantine_tests_marks_functions_and_class_methods(tmp_path):
+    path = tmp_path / "test_gen.py"
+    path.write_text(
+        '''"""Generated tests."""
+from __future__ import annotations
+
+
+def test_plain():
+    pass
+
+
+@pytest.mark.parametrize("x", [1, 2])
+def test_param(x):
+    pass
+
+
+class TestGroup:
+    def test_method(self):
+        pass
+''',
+        encoding="utf-8",
+    )
+    found = quarantine_tests(
+        str(path),
+        ["test_gen.py::TestGroup::test_method", "test_gen.py::test_param[2]", "test_gen.py::test_missing"],
+        "too slow",
+    )
+    assert found == ["test_gen.py::TestGroup::test_method", "test_gen.py::test_param[2]"]
+
+    text = path.read_text(encoding="utf-8")
+    marker = "@pytest.mark.skip(reason='quarantined: too slow')"
+    assert text.splitlines()[:3] == ['"""Generated tests."""', "from __future__ import annotations", "import pytest"]
+    assert f"{marker}\n@pytest.mark.parametrize" in text
+    assert f"    {marker}\n    def test_method" in text
+    assert f"{marker}\ndef test_plain" not in text
+    compile(text, str(path), "exec")
+
+
+@pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="the per-test limit needs SIGALRM")
+def test_per_test_limit_reports_a_timeout(tmp_path):
+    path = tmp_path / "test_hang.py"
+    path.write_text("import time\n\n\ndef test_hang():\n    time.sleep(30)\n\n\ndef test_ok():\n    pass\n", encoding="utf-8")
+    result = run_pytest_sandbox(str(path), timeout=20, per_test_limit=0.2)
+    outcomes = {t.test_id.rsplit("::", 1)[1]: t.outcome for t in result.test_outcomes}
+    assert outcomes == {"test_hang": "timeout", "test_ok": "passed"}
+    assert not result.timed_out